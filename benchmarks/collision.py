@@ -0,0 +1,82 @@
+# Measures the cost of checking the player against enemies for combat collision,
+# checking every enemy (pg.sprite.spritecollide on the whole group) vs. only enemies from nearby spatial hash cells.
+# With a fixed density (the map grows with the number of enemies) the spatial hash cost should stay about the same,
+# with a fixed map size (the density grows with the number of enemies) it should grow with the density.
+# Run from the repository root: python -m benchmarks.collision
+
+import os, random, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()
+
+from src import resource_handler
+from src.components import spatial_hash
+
+ENEMY_COUNTS = [100, 1000, 10000]
+SPACING = 20  # pixels of map per enemy, for the fixed density runs
+FIXED_MAP_WIDTH = 6000  # pixels, for the fixed map size runs
+QUERIES = 300
+
+
+def create_sprite(image, mask, pos):
+    sprite = pygame.sprite.Sprite()
+    sprite.image = image
+    sprite.mask = mask
+    sprite.rect = image.get_rect(bottomleft=pos)
+    return sprite
+
+
+# returns the average time (ms) of checking collision, for every enemy and with the spatial hash,
+# and of updating the spatial hash after every enemy moves
+def benchmark(resources, enemy_count, map_width):
+    random.seed(0)
+    enemy_image = resources["golem_idle"][0]
+    enemy_mask = resources.get_mask(enemy_image)
+    player_image = resources["woodcutter_idle"][0]
+    player = create_sprite(player_image, resources.get_mask(player_image), (0, 384))
+
+    group = pygame.sprite.Group()
+    spatial_group = spatial_hash.SpatialGroup()
+    for i in range(enemy_count):
+        enemy = create_sprite(enemy_image, enemy_mask, (random.uniform(0, map_width), 388))
+        group.add(enemy)
+        spatial_group.add(enemy)
+    spatial_group.update_positions(0)
+
+    player_positions = [random.uniform(0, map_width) for i in range(QUERIES)]
+    times = []
+    for check in (
+        lambda: pygame.sprite.spritecollide(player, group, False, pygame.sprite.collide_mask),
+        lambda: pygame.sprite.spritecollide(player, spatial_group.query(player.rect, 0), False, pygame.sprite.collide_mask)
+    ):
+        start = time.perf_counter()
+        for x in player_positions:
+            player.rect.x = x
+            check()
+        times.append((time.perf_counter() - start) * 1000 / QUERIES)
+
+    # enemies move a few pixels per step, so most stay in the same cells
+    for enemy in group:
+        enemy.rect.x += 3
+    start = time.perf_counter()
+    spatial_group.update_positions(0)
+    times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    pygame.display.set_mode((600, 400))
+    resources = resource_handler.load_resources()
+    for name, get_map_width in (("fixed density", lambda count: count * SPACING), ("fixed map size", lambda count: FIXED_MAP_WIDTH)):
+        print(name + ":")
+        for enemy_count in ENEMY_COUNTS:
+            map_width = get_map_width(enemy_count)
+            every_enemy, spatial, update = benchmark(resources, enemy_count, map_width)
+            print("  {} enemies over {}px: every enemy {:.3f}ms, spatial hash {:.3f}ms per check (+{:.3f}ms hash update per step)".format(
+                enemy_count, map_width, every_enemy, spatial, update))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Soak test for endless mode: runs the game for several simulated hours with a player that keeps running right,
+# and reports the cost of each step, the cost of drawing, and how much of the map and how many enemies are in memory.
+# All of these should stay about the same however long the game runs.
+# Run from the repository root: python -m benchmarks.endless_soak [simulated hours]
+
+import os, resource, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()
+
+from src import resource_handler
+from src.components import enemy_pool, streamer
+from src.states import game
+
+SIM_RATE = 30
+TILE_SIZE = 32
+REPORT_MINUTES = 30  # simulated minutes between reports
+DRAW_EVERY = SIM_RATE  # steps between drawn frames, drawing every step would make the soak take much longer
+
+
+# keeps the player running right: jumps over walls and gaps, attacks enemies, and never dies
+def autopilot(g):
+    player = g.player
+    player.health = player.max_health
+    player.move_direction = 1
+    if player.grounded:
+        # column just in front of the player's body
+        col = int((player.get_body()[0] + player.get_body()[2] + 8) // TILE_SIZE) - g.map.first_col
+        cols, rows = g.map.tilemap.shape
+        if player.vel_x == 0 or (col < cols and g.map.tilemap[col, rows-1] != 1):
+            player.jump()
+    if g.tick_count % SIM_RATE == 0:
+        player.last_attack = -player.attack_recovery
+        player.begin_attack()
+
+
+# puts the player back on the floor after falling through a gap, instead of ending the game
+def rescue(g):
+    g.game_over = False
+    cols, rows = g.map.tilemap.shape
+    col = min(max(int(g.player.get_centerx() // TILE_SIZE) - g.map.first_col, 0), cols-1)
+    while col < cols-1 and g.map.tilemap[col, rows-1] != 1:
+        col += 1
+    g.player.set_centerx((g.map.first_col + col) * TILE_SIZE + TILE_SIZE/2)
+    g.player.pos[1] = (rows-1) * TILE_SIZE
+    g.player.vel_y = 0
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    screen = pygame.display.set_mode((600, 400))
+    resources = resource_handler.load_resources()
+    # the music folder isn't part of the repository, and music doesn't matter here
+    pygame.mixer.music.play = lambda *args: None
+
+    pool = enemy_pool.EnemyPool(screen, resources)
+    g = game.Game(screen, resources, lambda **kwargs: None, lambda **kwargs: None, 0, "easy", TILE_SIZE, streamer.ENDLESS_MAP, SIM_RATE, "sprites", False, pool)
+
+    total_steps = int(hours * 3600 * SIM_RATE)
+    report_steps = REPORT_MINUTES * 60 * SIM_RATE
+    step_time = draw_time = 0
+    draws = 0
+    falls = 0
+    for step in range(1, total_steps+1):
+        autopilot(g)
+        start = time.perf_counter()
+        g.step()
+        step_time += time.perf_counter() - start
+        if g.game_over:
+            rescue(g)
+            falls += 1
+
+        if step % DRAW_EVERY == 0:
+            start = time.perf_counter()
+            g.draw([])
+            draw_time += time.perf_counter() - start
+            draws += 1
+
+        if step % report_steps == 0 or step == total_steps:
+            print("{:5.1f}h: {:.3f}ms/step, {:.3f}ms/draw, {} columns from {} loaded ({} chunks), {} enemies, {} spawns pending, {} defeated, {} falls, {} enemies fell, {:.0f}MB max RSS".format(
+                step / SIM_RATE / 3600, step_time * 1000 / report_steps, draw_time * 1000 / max(draws, 1),
+                g.map.tilemap.shape[0], g.map.first_col, len(g.map.chunks), len(g.enemies), len(g.spawn_index), g.enemies_defeated, falls, g.enemies_fallen,
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+            step_time = draw_time = 0
+            draws = 0
+    print(pool.format_stats())
+
+
+if __name__ == "__main__":
+    main()
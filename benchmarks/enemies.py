@@ -0,0 +1,82 @@
+# Measures how many simulation steps per second each enemy backend can run with 10, 1,000 and 10,000 active enemies.
+# Enemies are spread over a wide map with a floor and some walls, and all of them chase a player in the middle of the map.
+# Run from the repository root: python -m benchmarks.enemies [enemy counts...]
+
+import os, random, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+pygame.init()
+
+from src import resource_handler
+from src.components import enemy_batch, entities, map
+
+TILE_SIZE = 32
+MAP_WIDTH = 20  # backgrounds
+MAX_SECONDS = 2  # each backend runs for at most this long (but at least MIN_STEPS steps)
+MIN_STEPS = 3
+STEP_TIME = 1000 / 30
+
+
+def create_map(screen, resources):
+    cols = int(resources["bg.png"].get_width()*MAP_WIDTH/TILE_SIZE) + 1
+    rows = int(resources["bg.png"].get_height()/TILE_SIZE) + 1
+    tilemap = np.zeros((cols, rows), dtype=np.uint8)
+    tilemap[:, rows-1] = 1  # floor
+    tilemap[::12, rows-2] = 1  # walls for enemies to bump into
+    return map.Map(screen, resources, TILE_SIZE, {"name": "benchmark", "tilemap": tilemap, "width": MAP_WIDTH})
+
+
+# runs steps until MAX_SECONDS have passed, returns steps per second
+def run_steps(step):
+    steps = 0
+    start = time.perf_counter()
+    while steps < MIN_STEPS or time.perf_counter() - start < MAX_SECONDS:
+        step(steps)
+        steps += 1
+    return steps / (time.perf_counter() - start)
+
+
+def benchmark(screen, resources, game_map, enemy_count):
+    random.seed(0)
+    floor_y = (game_map.tilemap.shape[1]-1) * TILE_SIZE + 4
+    positions = [(random.uniform(0, game_map.pixel_width-108), floor_y) for i in range(enemy_count)]
+    player_centerx = game_map.pixel_width / 2
+    offsetx = player_centerx - screen.get_width()/2
+    death_callback = lambda: None
+
+    # every enemy updates itself
+    enemies = pygame.sprite.Group()
+    for pos in positions:
+        enemy = entities.Enemy(screen, resources, pos, death_callback, "easy", game_map.get_nearby_tiles, game_map.sweep, game_map.get_flow_direction)
+        enemy.active = True
+        enemies.add(enemy)
+    sprites_rate = run_steps(lambda steps: enemies.update(steps*STEP_TIME, offsetx, player_centerx))
+
+    # all enemies are updated at once, only on screen enemies are synced to sprites
+    sprite_groups = (pygame.sprite.Group(), pygame.sprite.Group())
+    batch = enemy_batch.EnemyBatch(screen, resources, game_map, "easy", death_callback, sprite_groups)
+    for pos in positions:
+        batch.add(pos)
+    batch.active[:batch.count] = True
+    def batch_step(steps):
+        batch.update(steps*STEP_TIME, player_centerx)
+        batch.sync_sprites(offsetx)
+    batch_rate = run_steps(batch_step)
+
+    print("{} enemies: sprites {:.1f} steps/s, batch {:.1f} steps/s ({:.1f}x)".format(enemy_count, sprites_rate, batch_rate, batch_rate/sprites_rate))
+
+
+def main():
+    enemy_counts = [int(count) for count in sys.argv[1:]] or [10, 1000, 10000]
+    screen = pygame.display.set_mode((600, 400))
+    resources = resource_handler.load_resources()
+    game_map = create_map(screen, resources)
+    for enemy_count in enemy_counts:
+        benchmark(screen, resources, game_map, enemy_count)
+
+
+if __name__ == "__main__":
+    main()
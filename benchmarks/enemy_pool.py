@@ -0,0 +1,45 @@
+# Measures the cost of spawning enemies that die and are replaced, creating a new Enemy every time vs. reusing dead enemies from an EnemyPool.
+# Run from the repository root: python -m benchmarks.enemy_pool
+
+import os, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+pygame.init()
+
+from src import resource_handler
+from src.components import enemy_pool, entities, map
+
+TILE_SIZE = 32
+ALIVE = 20  # enemies alive at once
+SPAWNS = 5000
+
+
+def main():
+    screen = pygame.display.set_mode((600, 400))
+    resources = resource_handler.load_resources()
+    tilemap = np.zeros((40, 13), dtype=np.uint8)
+    tilemap[:, 12] = 1
+    game_map = map.Map(screen, resources, TILE_SIZE, {"name": "benchmark", "tilemap": tilemap, "width": 2})
+    callbacks = (lambda: None, "easy", game_map.get_nearby_tiles, game_map.sweep, game_map.get_flow_direction)
+    pos = (100, 12*TILE_SIZE + 4)
+
+    def create(pos):
+        return entities.Enemy(screen, resources, pos, *callbacks)
+
+    pool = enemy_pool.EnemyPool(screen, resources)
+    for name, get_enemy in (("new enemies", create), ("enemy pool", lambda pos: pool.get(pos, *callbacks))):
+        group = pygame.sprite.Group()
+        start = time.perf_counter()
+        for i in range(SPAWNS):
+            if len(group) >= ALIVE:
+                group.sprites()[0].kill()
+            group.add(get_enemy(pos))
+        print("{}: {:.1f}us per spawn".format(name, (time.perf_counter() - start) * 1e6 / SPAWNS))
+    print(pool.format_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Measures the cost of enemy pathing with the map's flow field.
+# The field is worked out once each time the player moves to a new tile, however many enemies there are,
+# and each enemy only looks up the direction of its tile, so the cost per enemy should stay about the same as enemies are added.
+# Run from the repository root: python -m benchmarks.flow_field [enemy counts...]
+
+import os, random, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+pygame.init()
+
+from src import resource_handler
+from src.components import map, map_generator
+
+TILE_SIZE = 32
+MAP_WIDTH = 20  # backgrounds
+FIELDS = 50  # number of times the field is worked out for a new player tile
+
+
+# a map with gaps, steps and platforms to walk off
+def create_map(screen, resources):
+    random.seed(0)
+    map_data = map_generator.generate_map(resources["bg.png"].get_size(), TILE_SIZE, 0, MAP_WIDTH, "benchmark", enemy_density=0, portal=False)
+    return map.Map(screen, resources, TILE_SIZE, map_data)
+
+
+def main():
+    enemy_counts = [int(count) for count in sys.argv[1:]] or [10, 1000, 10000]
+    screen = pygame.display.set_mode((600, 400))
+    resources = resource_handler.load_resources()
+    game_map = create_map(screen, resources)
+    floor_y = (game_map.tilemap.shape[1]-1) * TILE_SIZE
+
+    start = time.perf_counter()
+    for i in range(FIELDS):
+        game_map.update_flow_field((i*TILE_SIZE + TILE_SIZE/2, floor_y))
+    print("field for a new player tile: {:.3f}ms ({} tiles)".format((time.perf_counter() - start) * 1000 / FIELDS, game_map.tilemap.size))
+
+    for enemy_count in enemy_counts:
+        positions = [(random.uniform(0, game_map.pixel_width), floor_y) for i in range(enemy_count)]
+
+        # each enemy looks up its own direction (entities.Enemy)
+        start = time.perf_counter()
+        for pos in positions:
+            game_map.get_flow_direction(pos)
+        sprites_time = (time.perf_counter() - start) * 1000
+
+        # every enemy's direction is looked up at once (enemy_batch.EnemyBatch)
+        xs = np.array([pos[0] for pos in positions])
+        ys = np.array([pos[1] for pos in positions])
+        start = time.perf_counter()
+        game_map.flow_field.get_directions(xs, ys)
+        batch_time = (time.perf_counter() - start) * 1000
+
+        print("{} enemies: sprites {:.3f}ms ({:.3f}us per enemy), batch {:.3f}ms ({:.3f}us per enemy)".format(
+            enemy_count, sprites_time, sprites_time * 1000 / enemy_count, batch_time, batch_time * 1000 / enemy_count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Measures the time to generate maps of different widths with map_generator, to load them into a Map, and to draw their first frame.
+# Chunks of the map are only baked when they are drawn, so loading and memory should grow much slower than the width of the map.
+# Max RSS is the peak of the whole process so far, widths are run from narrowest to widest.
+# Run from the repository root: python -m benchmarks.map_generator [widths...]
+
+import os, resource, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()
+
+from src import resource_handler
+from src.components import map, map_generator
+
+TILE_SIZE = 32
+REPEATS = 5
+
+
+def main():
+    widths = sorted(int(width) for width in sys.argv[1:]) or [10, 100, 1000]
+    screen = pygame.display.set_mode((600, 400))
+    resources = resource_handler.load_resources()  # only needed to load the maps into a Map and draw them
+    bg_size = resources["bg.png"].get_size()
+
+    for width in widths:
+        start = time.perf_counter()
+        for seed in range(REPEATS):
+            map_data = map_generator.generate_map(bg_size, TILE_SIZE, seed, width)
+        generate_time = (time.perf_counter() - start) * 1000 / REPEATS
+
+        start = time.perf_counter()
+        game_map = map.Map(screen, resources, TILE_SIZE, map_data)
+        load_time = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        game_map.draw(0)
+        draw_time = (time.perf_counter() - start) * 1000
+
+        tilemap = map_data["tilemap"]
+        print("{} backgrounds ({} tiles, {} enemies): generate {:.2f}ms, load into Map {:.1f}ms, first draw {:.1f}ms ({}/{} chunks baked), {:.0f}MB max RSS".format(
+            width, tilemap.size, (tilemap == 2).sum(), generate_time, load_time, draw_time, len(game_map.chunks), game_map.chunk_count,
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+if __name__ == "__main__":
+    main()
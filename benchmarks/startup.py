@@ -0,0 +1,35 @@
+# Measures how long it takes to load every resource with different numbers of decoding threads,
+# then how long it takes with the on-disk decode cache (first run fills the cache, second run reads it).
+# Run from the repository root: python -m benchmarks.startup [max workers]
+
+import os, sys, tempfile
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()
+
+from src import resource_handler
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    pygame.display.set_mode((600, 400))
+
+    workers = 1
+    while workers <= max_workers:
+        # a fresh resources dictionary each time, so nothing is already loaded
+        resources = resource_handler.load_resources(workers)
+        report = resources.warm_up()
+        print("no cache:   ", resource_handler.format_load_report(report))
+        workers *= 2
+
+    with tempfile.TemporaryDirectory() as cache_path:
+        for run in ("cold cache: ", "warm cache: "):
+            resources = resource_handler.load_resources(max_workers, cache_path)
+            report = resources.warm_up()
+            print(run, resource_handler.format_load_report(report))
+
+
+if __name__ == "__main__":
+    main()
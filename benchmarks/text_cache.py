@@ -0,0 +1,40 @@
+# Measures how long it takes to draw the healthbars of many enemies with and without the text cache,
+# and reports the cache's hit rate.
+# Run from the repository root: python -m benchmarks.text_cache [number of enemies]
+
+import os, random, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()
+
+from src.components import text
+
+FRAMES = 300
+
+
+def main():
+    enemy_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    screen = pygame.display.set_mode((600, 400))
+    font = text.get_font(None, 20)
+    random.seed(0)
+    healths = [random.randint(1, 10) for i in range(enemy_count)]
+
+    for name, render in (("font.render:", font.render), ("text cache: ", lambda *args: text.render(font, *args))):
+        start = time.perf_counter()
+        for frame in range(FRAMES):
+            # an enemy loses health every few frames, like in a fight
+            if frame % 10 == 0:
+                i = random.randrange(enemy_count)
+                healths[i] = max(healths[i] - 1, 0)
+            for health in healths:
+                screen.blit(render(str(health), True, "black"), (0, 0))
+        elapsed = time.perf_counter() - start
+        print(name, "{} healthbars: {:.3f}ms per frame".format(enemy_count, elapsed * 1000 / FRAMES))
+
+    print(text.text_cache.format_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Bitmask autotiling for ground tiles.
+# Every ground tile gets an 8 bit mask describing which of its 8 neighbours are also ground tiles.
+# The mask is then mapped to a tile image through a lookup table that is built once at import time.
+
+import numpy as np
+
+# bit for each neighbour of a tile
+TOP = 1
+TOP_RIGHT = 2
+RIGHT = 4
+BOTTOM_RIGHT = 8
+BOTTOM = 16
+BOTTOM_LEFT = 32
+LEFT = 64
+TOP_LEFT = 128
+
+# (bit, column offset, row offset) for each neighbour
+NEIGHBOURS = [
+    (TOP, 0, -1),
+    (TOP_RIGHT, 1, -1),
+    (RIGHT, 1, 0),
+    (BOTTOM_RIGHT, 1, 1),
+    (BOTTOM, 0, 1),
+    (BOTTOM_LEFT, -1, 1),
+    (LEFT, -1, 0),
+    (TOP_LEFT, -1, -1)
+]
+
+
+# chooses the tile image for a ground tile given its neighbour mask
+def choose_image(mask):
+    top = mask & TOP
+    right = mask & RIGHT
+    bottom = mask & BOTTOM
+    left = mask & LEFT
+
+    # tiles with nothing above them are grass tiles
+    if not top:
+        if bottom:
+            if right and left:
+                return "Tile_02.png"
+            elif right:
+                return "Tile_01.png"
+            elif left:
+                return "Tile_03.png"
+            return "Tile_05.png"
+        if right and left:
+            return "Tile_07.png"
+        elif right:
+            return "Tile_06.png"
+        elif left:
+            return "Tile_08.png"
+        return "Tile_18.png"
+
+    # tiles with something above them are dirt tiles with borders on their open sides
+    if not bottom:
+        if right and left:
+            return "Tile_26.png"
+        elif right:
+            return "Tile_25.png"
+        elif left:
+            return "Tile_28.png"
+        return "Tile_29.png"
+    if right and left:
+        # inner corners where only the diagonal tile below is missing
+        bottom_right = mask & BOTTOM_RIGHT
+        bottom_left = mask & BOTTOM_LEFT
+        if bottom_left and not bottom_right:
+            return "Tile_19.png"
+        elif bottom_right and not bottom_left:
+            return "Tile_20.png"
+        return "Tile_04.png"
+    elif right:
+        return "Tile_61.png"
+    elif left:
+        return "Tile_62.png"
+    return "Tile_60.png"
+
+
+# image name for every possible mask
+LOOKUP_TABLE = [choose_image(mask) for mask in range(256)]
+
+
+# computes the neighbour mask of every tile in a padded boolean grid
+# the padding is one tile on every side and is not included in the result
+def masks_from_padded(padded):
+    cols = padded.shape[0] - 2
+    rows = padded.shape[1] - 2
+    masks = np.zeros((cols, rows), dtype=np.uint8)
+    for bit, di, dk in NEIGHBOURS:
+        masks |= padded[1+di:1+di+cols, 1+dk:1+dk+rows].astype(np.uint8) * np.uint8(bit)
+    return masks
+
+
+# computes the neighbour mask of every tile in the grid in one pass
+# solid is a 2d boolean array indexed [column][row], tiles outside of the grid count as empty
+def compute_masks(solid):
+    return masks_from_padded(np.pad(solid, 1))
+
+
+# computes the neighbour masks for the tiles in columns [i0, i1) and rows [k0, k1) only
+# used when a single tile changes, so the rest of the grid does not need to be recomputed
+def compute_region_masks(solid, i0, i1, k0, k1):
+    cols, rows = solid.shape
+    padded = np.zeros((i1-i0+2, k1-k0+2), dtype=bool)
+    src_i0, src_i1 = max(i0-1, 0), min(i1+1, cols)
+    src_k0, src_k1 = max(k0-1, 0), min(k1+1, rows)
+    padded[src_i0-(i0-1):src_i1-(i0-1), src_k0-(k0-1):src_k1-(k0-1)] = solid[src_i0:src_i1, src_k0:src_k1]
+    return masks_from_padded(padded)
@@ -0,0 +1,438 @@
+# Batched enemy simulation.
+# Instead of every Enemy updating itself, the variables of every enemy are kept in NumPy arrays (one array per variable)
+# and all enemies are advanced at once with array operations.
+# Only enemies that are on screen get a sprite (an EnemyView), which is synced from the arrays,
+# so they can be drawn and collide with the player the same way Enemy sprites do.
+
+import numpy as np
+import pygame as pg
+from . import entities, flow_field
+
+# enemy states
+IDLE, RUN, ATTACK, HURT, DEAD, FALL = range(6)
+STATE_NAMES = ["idle", "run", "attack", "hurt", "dead", "fall"]
+
+# the values below are the same as in entities.Enemy
+FRAME_COUNTS = np.array([12, 18, 12, 12, 15, 12])  # frames in the animation of each state (fall uses the idle animation)
+ANIMATION_COOLDOWN = 50
+ACTIVE_ATTACK_FRAMES = [7, 8, 9]
+ATTACK_DISTANCE = 40
+IMAGE_WIDTH = 108
+# collision rect of an enemy relative to its pos (bottom left of its image)
+RECT_LEFT = 41
+RECT_BOTTOM = 4
+RECT_SIZE = (26, 53)
+
+
+# simulates every enemy of a game at once
+# enemies are referred to by their index in the arrays
+class EnemyBatch:
+    def __init__(self, parent, resources, map, difficulty, death_callback, sprite_groups):
+        self.parent = parent
+        self.resources = resources
+        self.death_callback = death_callback
+        self.sprite_groups = sprite_groups  # groups that the sprites of on screen enemies are added to
+        self.max_health, self.speed = entities.ENEMY_STATS[difficulty]
+        self.cur_time = pg.time.get_ticks()
+
+        # format -> state: (image, reverse image), indexed by state number
+        self.animations = [
+            (resources["golem_idle"], resources["golem_idle_reverse"]),
+            (resources["golem_walk"], resources["golem_walk_reverse"]),
+            (resources["golem_attack"], resources["golem_attack_reverse"]),
+            (resources["golem_hurt"], resources["golem_hurt_reverse"]),
+            (resources["golem_death"], resources["golem_death_reverse"]),
+            (resources["golem_idle"], resources["golem_idle_reverse"])
+        ]
+        self.attack_sound = resources["swing.mp3"]
+        self.hurt_sound = resources["enemy_hurt.mp3"]
+        self.death_sound = resources["enemy_hurt.mp3"]
+
+        # enemy variables, each array has an item for every enemy
+        # arrays have room for capacity enemies, the first count are in use
+        # slots of dead enemies are reused by the next enemies added, so the arrays only grow with the number of enemies alive at once
+        self.count = 0
+        self.capacity = 0
+        self.free_slots = []  # indexes below count of enemies that are no longer alive
+        self.arrays = {
+            "x": np.float64, "y": np.float64,  # bottom left pos
+            "prev_x": np.float64, "prev_y": np.float64,  # pos at the start of the last simulation step
+            "vel_x": np.float64, "vel_y": np.float64,
+            "move_direction": np.int8,  # -1 = left, 0 = none, 1 = right
+            "direction": np.int8,  # 1 = right, 0 = left
+            "state": np.int8,
+            "animation_step": np.int32,
+            "last_animation": np.float64,
+            "health": np.int32,
+            "active": bool,  # enemies become active after they see the player
+            "alive": bool,
+            "grounded": bool,
+            "active_attack": bool,
+            "attack_sound_played": bool
+        }
+        for name, dtype in self.arrays.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+
+        self.views = {}  # index -> EnemyView of each enemy that is on screen
+
+        self.tile_size = map.tile_size
+        self.load_collision(map.tilemap == 1)
+        self.flow_field = map.flow_field  # directions leading to the player, updated by the game
+
+
+    # builds the lookup tables used for tile collision from a 2d boolean array of solid tiles
+    # a column of empty tiles is added on each side of the map, so enemies outside of the map don't need special cases
+    def load_collision(self, solid):
+        cols, rows = solid.shape
+        self.rows = rows
+        padded = np.zeros((cols+2, rows), dtype=bool)
+        padded[1:-1] = solid
+
+        # merged collision rects start at the top of each vertical run of ground tiles
+        # next_top[i, k] is the first row at or below row k that is the top of a run in column i (rows if there isn't one)
+        tops = padded & ~np.pad(padded, ((0, 0), (1, 0)))[:, :-1]
+        next_top = np.where(tops, np.arange(rows), rows)
+        next_top = np.minimum.accumulate(next_top[:, ::-1], axis=1)[:, ::-1]
+        self.next_top = np.concatenate((next_top, np.full((cols+2, 1), rows)), axis=1)
+
+        # solid_count[i, k] is the number of ground tiles above row k in column i
+        self.solid_count = np.zeros((cols+2, rows+1), dtype=np.int32)
+        self.solid_count[:, 1:] = np.cumsum(padded, axis=1)
+
+
+    # adds an enemy at pos (bottom left of its image), in the slot of a dead enemy if there is one
+    def add(self, pos):
+        if self.free_slots:
+            self.reset_slot(self.free_slots.pop(), pos)
+            return
+
+        if self.count == self.capacity:
+            self.capacity = max(self.capacity * 2, 16)
+            for name in self.arrays:
+                array = getattr(self, name)
+                new_array = np.zeros(self.capacity, dtype=array.dtype)
+                new_array[:self.count] = array[:self.count]
+                setattr(self, name, new_array)
+
+        self.count += 1
+        self.reset_slot(self.count - 1, pos)
+
+
+    # sets the variables of the enemy in slot i to those of a new enemy at pos
+    def reset_slot(self, i, pos):
+        self.x[i] = self.prev_x[i] = pos[0]
+        self.y[i] = self.prev_y[i] = pos[1]
+        self.vel_x[i] = self.vel_y[i] = 0
+        self.move_direction[i] = 0
+        self.direction[i] = 1
+        self.state[i] = IDLE
+        self.animation_step[i] = 1  # enemies start by showing the first idle frame
+        self.last_animation[i] = pg.time.get_ticks()
+        self.health[i] = self.max_health
+        self.active[i] = False
+        self.alive[i] = True
+        self.grounded[i] = True
+        self.active_attack[i] = False
+        self.attack_sound_played[i] = False
+
+
+    # advances every enemy by one simulation step
+    def update(self, cur_time, player_centerx):
+        self.cur_time = cur_time
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+        # activate upon getting close to player
+        # enemies only start updating normally on the step after they are activated
+        updating = np.nonzero(self.alive[:n] & self.active[:n])[0]
+        inactive = self.alive[:n] & ~self.active[:n]
+        self.active[:n] |= inactive & (np.abs(self.x[:n] - player_centerx) < entities.ENEMY_ACTIVATION_DISTANCE)
+
+        updating = self.handle_states(updating, player_centerx)
+        self.update_pos(updating)
+        self.handle_gravity(updating)
+        self.animate(updating[self.cur_time - self.last_animation[updating] > ANIMATION_COOLDOWN])
+
+
+    # handles the state of each enemy in indexes, like Entity.handle_state()
+    # returns the indexes of the enemies that are still alive
+    def handle_states(self, indexes, player_centerx):
+        state = self.state[indexes]
+        step = self.animation_step[indexes]
+        animation_ended = step > FRAME_COUNTS[state]
+
+        # enemies are removed when their death animation ends
+        dying = (state == DEAD) & animation_ended
+        for i in indexes[dying].tolist():
+            self.kill(i)
+
+        # hurt and attack states go back to idle when their animation ends
+        self.change_state(indexes[((state == HURT) | (state == ATTACK)) & animation_ended], IDLE)
+
+        # attack hitbox is active during some frames of the attack animation
+        attacking = indexes[self.state[indexes] == ATTACK]
+        active_attack = np.isin(self.animation_step[attacking], ACTIVE_ATTACK_FRAMES)
+        if np.any(active_attack & ~self.attack_sound_played[attacking]):
+            self.attack_sound.play()
+        self.attack_sound_played[attacking[active_attack]] = True
+        self.active_attack[attacking] = active_attack
+
+        # idle, running and falling enemies move
+        moving = (state == IDLE) | (state == RUN) | (state == FALL)
+        self.move(indexes[moving])
+
+        # falling enemies go back to idle once they land
+        falling = indexes[state == FALL]
+        self.change_state(falling[self.grounded[falling]], IDLE)
+
+        # other enemies attack the player if they are close enough, otherwise they move towards the player
+        chasing = indexes[moving & (state != FALL)]
+        distance = player_centerx - (self.x[chasing] + IMAGE_WIDTH/2)
+        close = np.abs(distance) < ATTACK_DISTANCE
+        self.begin_attack(chasing[close])
+        far = chasing[~close]
+        self.move_to_player(far, distance[~close])
+
+        return indexes[~dying]
+
+
+    # sets the direction enemies move in from the map's flow field, like Enemy.move_to_player()
+    def move_to_player(self, indexes, distance):
+        if self.flow_field.field is None:
+            self.move_direction[indexes] = np.where(distance > 1, 1, np.where(distance < -1, -1, 0))
+            return
+        directions = self.flow_field.get_directions(self.x[indexes] + RECT_LEFT + RECT_SIZE[0]/2, self.y[indexes] - RECT_BOTTOM)
+        following = directions != flow_field.AIR
+        self.move_direction[indexes[following]] = directions[following]
+
+
+    # sets the x velocity of enemies depending on what direction they are trying to move in, like Entity.move()
+    def move(self, indexes):
+        move_direction = self.move_direction[indexes]
+        self.vel_x[indexes] = move_direction * self.speed
+
+        state = self.state[indexes]
+        self.change_state(indexes[(move_direction != 0) & (state == IDLE)], RUN)
+        self.change_state(indexes[(move_direction == 0) & (state == RUN)], IDLE)
+
+        # if changing direction, immediately move to next animation step
+        new_direction = (move_direction == 1).astype(np.int8)
+        turning = (move_direction != 0) & (self.direction[indexes] != new_direction)
+        self.direction[indexes[turning]] = new_direction[turning]
+        self.animate(indexes[turning])
+
+
+    def begin_attack(self, indexes):
+        self.vel_x[indexes] = 0
+        self.attack_sound_played[indexes] = False
+        self.change_state(indexes, ATTACK)
+
+
+    # changes the state of enemies, like Entity.change_state()
+    def change_state(self, indexes, new_state):
+        self.state[indexes] = new_state
+        self.active_attack[indexes] = False
+        self.animation_step[indexes] = 0
+        self.animate(indexes)
+
+
+    # moves enemies to the next step in their animation loop
+    # the image shown is picked from the animation step when an enemy is synced to its sprite
+    def animate(self, indexes):
+        self.last_animation[indexes] = self.cur_time
+        self.animation_step[indexes] += 1
+
+
+    # moves enemies by their velocity, stopping at ground tiles, like Entity.update_pos()
+    # y movement is done first, then x movement
+    def update_pos(self, indexes):
+        # enemies that are outside of the map don't move
+        # except below it, so enemies that fall through a gap keep falling until they are removed (see remove_below())
+        center_i = np.trunc((self.x[indexes] + 54) / self.tile_size)
+        center_k = np.trunc((self.y[indexes] - 34) / self.tile_size)
+        in_map = (center_i >= 0) & (center_i < self.next_top.shape[0]-2) & (center_k >= 0)
+        indexes = indexes[in_map]
+        self.update_posy(indexes)
+        self.update_posx(indexes)
+
+
+    # returns the columns (in the padded collision tables) of the left and right of collision rects
+    def get_rect_columns(self, left):
+        first = np.floor(left / self.tile_size).astype(np.int64) + 1
+        last = np.floor((left + RECT_SIZE[0] - 1) / self.tile_size).astype(np.int64) + 1
+        max_col = self.next_top.shape[0] - 1
+        return np.clip(first, 0, max_col), np.clip(last, 0, max_col)
+
+
+    # enemies don't jump, so they can only collide with the top of ground tiles when moving vertically
+    def update_posy(self, indexes):
+        y = self.y[indexes]
+        new_y = y - self.vel_y[indexes]
+        bottom = y - RECT_BOTTOM
+        new_bottom = new_y - RECT_BOTTOM
+        first_col, last_col = self.get_rect_columns(self.x[indexes] + RECT_LEFT)
+
+        # the first top of a ground tile at or below the bottom of each enemy
+        start_row = np.clip(np.ceil(bottom / self.tile_size).astype(np.int64), 0, self.rows)
+        top_row = np.minimum(self.next_top[first_col, start_row], self.next_top[last_col, start_row])
+        landed = (top_row < self.rows) & (top_row * self.tile_size < new_bottom) & (new_bottom > bottom)
+
+        self.y[indexes] = np.where(landed, top_row * self.tile_size + RECT_BOTTOM, new_y)
+        self.vel_y[indexes[landed & (self.vel_y[indexes] < 0)]] = 0
+        self.grounded[indexes] = landed
+
+
+    def update_posx(self, indexes):
+        vel_x = self.vel_x[indexes]
+        left = self.x[indexes] + RECT_LEFT
+        right = left + RECT_SIZE[0]
+        new_left = left + vel_x
+        bottom = self.y[indexes] - RECT_BOTTOM
+
+        # rows the collision rect overlaps
+        first_row = np.clip(np.floor((bottom - RECT_SIZE[1]) / self.tile_size).astype(np.int64), 0, self.rows)
+        last_row = np.clip(np.floor((bottom - 1) / self.tile_size).astype(np.int64) + 1, 0, self.rows)
+
+        # the column each enemy moves into, and whether it has a ground tile in the rows of the enemy
+        # the collision tables are padded by one column, so column c is at c+1
+        moving_right = vel_x > 0
+        edge = np.where(moving_right, new_left + RECT_SIZE[0] - 1, new_left)
+        col = np.floor(edge / self.tile_size).astype(np.int64)
+        padded_col = np.clip(col + 1, 0, self.solid_count.shape[0] - 1)
+        blocked = self.solid_count[padded_col, last_row] - self.solid_count[padded_col, first_row] > 0
+        # only columns the enemy wasn't already in can block it
+        blocked &= np.where(moving_right, col * self.tile_size >= right, (col + 1) * self.tile_size <= left)
+        blocked &= vel_x != 0
+
+        blocked_left = np.where(moving_right, col * self.tile_size - RECT_SIZE[0], (col + 1) * self.tile_size)
+        self.x[indexes] = np.where(blocked, blocked_left, new_left) - RECT_LEFT
+        self.vel_x[indexes[blocked]] = 0
+
+
+    # handle falling, gravity
+    def handle_gravity(self, indexes):
+        self.vel_y[indexes] -= 1
+        state = self.state[indexes]
+        self.change_state(indexes[~self.grounded[indexes] & ((state == IDLE) | (state == RUN))], FALL)
+
+
+    # processes when an enemy gets attacked, like Entity.receive_attack()
+    def receive_attack(self, i, damage):
+        if self.state[i] != HURT and self.state[i] != DEAD:
+            self.health[i] -= damage
+            self.vel_x[i] = 0
+            if self.health[i] <= 0:
+                self.death_sound.play()
+                self.change_state([i], DEAD)
+            else:
+                self.hurt_sound.play()
+                self.change_state([i], HURT)
+            if i in self.views:
+                self.views[i].sync()
+
+
+    # removes an enemy after it dies
+    def kill(self, i):
+        self.alive[i] = False
+        self.free_slots.append(i)
+        self.death_callback()
+        view = self.views.pop(i, None)
+        if view != None:
+            view.kill()
+
+
+    # removes the enemies whose body is below bottom (e.g., after falling out of the map), without counting them as defeated
+    # returns how many enemies were removed
+    def remove_below(self, bottom):
+        n = self.count
+        fallen = np.nonzero(self.alive[:n] & (self.y[:n] - RECT_BOTTOM - RECT_SIZE[1] > bottom))[0]
+        self.alive[fallen] = False
+        self.free_slots.extend(fallen.tolist())
+        for i in fallen.tolist():
+            view = self.views.pop(i, None)
+            if view != None:
+                view.kill()
+        return len(fallen)
+
+
+    # gives every enemy that is on screen a sprite, and syncs the sprites with the arrays
+    # sprites of enemies that left the screen are removed from the sprite groups
+    def sync_sprites(self, offsetx):
+        n = self.count
+        screen_x = self.x[:n] - offsetx
+        on_screen = self.alive[:n] & (screen_x < self.parent.get_width()) & (screen_x + IMAGE_WIDTH > 0)
+
+        for i in list(self.views):
+            if not on_screen[i]:
+                self.views.pop(i).kill()
+        for i in np.nonzero(on_screen)[0].tolist():
+            view = self.views.get(i)
+            if view == None:
+                view = EnemyView(self, i)
+                self.views[i] = view
+                for group in self.sprite_groups:
+                    group.add(view)
+            else:
+                view.sync()
+
+
+
+# sprite of an on screen enemy in an EnemyBatch
+# has the attributes that drawing and collision with the player use, copied from the batch's arrays
+class EnemyView(pg.sprite.Sprite):
+    def __init__(self, batch, index):
+        super().__init__()
+        self.batch = batch
+        self.index = index
+        self.max_health = batch.max_health
+        self.pos = [0, 0]
+        self.prev_pos = [0, 0]
+        self.sync()
+        self.rect = self.image.get_rect()
+        self.healthbar = entities.Healthbar(batch.parent, self)
+
+
+    # copies the enemy's variables from the batch
+    def sync(self):
+        batch = self.batch
+        i = self.index
+        self.pos[0], self.pos[1] = float(batch.x[i]), float(batch.y[i])
+        self.prev_pos[0], self.prev_pos[1] = float(batch.prev_x[i]), float(batch.prev_y[i])
+        self.health = int(batch.health[i])
+        self.active = bool(batch.active[i])
+        self.active_attack = bool(batch.active_attack[i])
+
+        state = int(batch.state[i])
+        self.state = STATE_NAMES[state]
+        frames = batch.animations[state][0 if batch.direction[i] else 1]
+        self.frame = int((int(batch.animation_step[i]) - 1) % FRAME_COUNTS[state])  # frame of the animation shown
+        self.direction = int(batch.direction[i])
+        self.image = frames[self.frame]
+        self.mask = batch.resources.get_mask(self.image)
+
+
+    # positions are saved by the batch at the start of each step
+    def save_prev_pos(self):
+        pass
+
+
+    # drawing uses the same interpolation as other entities
+    get_draw_offset = entities.Entity.get_draw_offset
+    update_rect = entities.Entity.update_rect
+
+
+    # collision rect of the enemy's body, like Enemy.get_rect()
+    def get_rect(self, offsetx):
+        return pg.Rect(self.pos[0] + RECT_LEFT - offsetx, self.pos[1] - RECT_BOTTOM - RECT_SIZE[1], RECT_SIZE[0], RECT_SIZE[1])
+
+
+    # rect that the enemy's attack can hit, like Entity.get_hitbox()
+    def get_hitbox(self, offsetx):
+        if not self.active_attack or self.frame not in entities.ENEMY_ATTACK_HITBOXES:
+            return None
+        return entities.get_attack_hitbox(entities.ENEMY_ATTACK_HITBOXES[self.frame], self.image, self.pos, self.direction, offsetx)
+
+
+    def receive_attack(self, damage):
+        self.batch.receive_attack(self.index, damage)
@@ -0,0 +1,57 @@
+# Pool of Enemy objects that are reused instead of being created for every spawn.
+# Dead enemies go back to the pool (see Enemy.kill()), and the next spawn resets one of them with Enemy.reset(),
+# so their animation dictionaries, healthbars and sprite state don't have to be created again.
+# The pool is owned by Control, so enemies are also reused between games (e.g., when playing again).
+
+from . import entities
+
+ENEMY_POOL_SIZE = 64  # maximum number of dead enemies kept for reuse
+
+
+class EnemyPool:
+    def __init__(self, parent, resources, max_size=ENEMY_POOL_SIZE):
+        self.parent = parent
+        self.resources = resources
+        self.max_size = max_size
+        self.enemies = []  # dead enemies that can be reused
+
+        # statistics, for sizing the pool
+        self.hits = 0  # spawns that reused an enemy
+        self.misses = 0  # spawns that had to create a new enemy
+
+
+    # returns an enemy at pos, reusing a dead enemy if there is one
+    # arguments are the same as the arguments of Enemy()
+    def get(self, pos, death_callback, difficulty, get_nearby_tiles, sweep_solids, get_flow_direction):
+        if self.enemies:
+            self.hits += 1
+            enemy = self.enemies.pop()
+            enemy.bind(death_callback, get_nearby_tiles, sweep_solids, get_flow_direction)
+            enemy.reset(pos, difficulty)
+        else:
+            self.misses += 1
+            enemy = entities.Enemy(self.parent, self.resources, pos, death_callback, difficulty, get_nearby_tiles, sweep_solids, get_flow_direction)
+            enemy.pool = self
+        return enemy
+
+
+    # takes back an enemy that is no longer used, removing it from every group it is in
+    # enemies past max_size are left for garbage collection
+    def release(self, enemy):
+        enemy.remove(*enemy.groups())
+        if len(self.enemies) < self.max_size:
+            self.enemies.append(enemy)
+
+
+    # returns the fraction of spawns that reused an enemy
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        if total == 0:
+            return 0
+        return self.hits / total
+
+
+    # returns the pool statistics as a line of text
+    def format_stats(self):
+        return "{} spawns, {} hits, {} misses ({:.1%} hit rate), {}/{} enemies pooled".format(
+            self.hits + self.misses, self.hits, self.misses, self.get_hit_rate(), len(self.enemies), self.max_size)
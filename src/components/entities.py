@@ -2,37 +2,57 @@
 # Subclasses of Entity include Player and Enemy.
 
 import pygame as pg
+from . import flow_field, text
 
 
 
 # base class for all entities
 # objects that inherit from Entity MUST have a self.animation_ref dictionary containing all assets for animation before calling __init__ method of the Entity class
 class Entity(pg.sprite.Sprite):
-  def __init__(self, parent, resources, init_pos, animation_cooldown, health, speed, active_attack_frames, get_nearby_tiles):
+  def __init__(self, parent, resources, init_pos, animation_cooldown, health, speed, active_attack_frames, get_nearby_tiles, sweep_solids):
     super().__init__()
-    self.cur_time = pg.time.get_ticks()
     
     self.parent = parent
     self.resources = resources
     self.active_attack_frames = active_attack_frames
     self.get_nearby_tiles = get_nearby_tiles # method to get tiles near this entity
+    self.sweep_solids = sweep_solids # method to move a box until it hits a ground tile
+
+    # Sprite variables
+    self.image = self.animation_ref["idle"][0][0]
+    self.image_length = self.animation_ref["idle"][0][0].get_height()
+    # rect controls the position of sprite when drawing
+    self.rect = self.image.get_rect()
+
+    self.animation_cooldown = animation_cooldown
+    self.floor = 390 # y position of floor
+
+    # subclasses set self.attack_hitboxes before calling __init__, see get_hitbox()
+
+    # Healthbar
+    self.healthbar = Healthbar(self.parent, self)
+
+    self.reset_state(init_pos, health, speed)
+
+
+  # sets every variable that changes during the entity's life back to how it starts
+  # called when the entity is created, and when a pooled enemy is reused (see Enemy.reset())
+  def reset_state(self, init_pos, health, speed):
+    self.cur_time = pg.time.get_ticks()
 
     self.max_health = health
     self.health = health
     self.speed = speed
 
     self.pos = list(init_pos)  # bottom left pos
+    self.prev_pos = list(init_pos)  # pos at the start of the last simulation step, for drawing between steps
 
-    # Sprite variables
     self.image = self.animation_ref["idle"][0][0]
-    self.image_length = self.animation_ref["idle"][0][0].get_height()
-    # rect controls the position of sprite when drawing
-    self.rect = self.image.get_rect()
     # mask is for pixel perfect hitbox
-    self.mask = pg.mask.from_surface(self.image)
+    # masks of every animation frame are built once by the resources dictionary
+    self.mask = self.resources.get_mask(self.image)
 
     # animation variables
-    self.animation_cooldown = animation_cooldown
     self.animation_step = 0 # current step of animation in animation loop
     self.last_animation = 0 # time of last animation step
     self.animation_paused = False # whether animation is paused
@@ -43,19 +63,15 @@ class Entity(pg.sprite.Sprite):
     self.vel_y = 0
     self.direction = 1  # 1 = right, 0 = left
     self.move_direction = 0 # the direction the entity is trying to move in.
-    self.floor = 390 # y position of floor
 
     # state variables
-    self.state = None  # set at end of __init__()
+    self.state = None  # set at end of reset_state()
     self.last_change_state = 0 # the time of the last state change
     self.grounded = True  # whether entity is touching the ground
 
     # attack variables
     self.active_attack = False # whether attack hitbox should be active
 
-    # Healthbar
-    self.healthbar = Healthbar(self.parent, self)
-
     # initially start on idle state
     self.change_state("idle")
 
@@ -84,76 +100,37 @@ class Entity(pg.sprite.Sprite):
 
   # updates y position depending on vel_y and checks tile collision
   def update_posy(self, offsetx):
-    newy = self.pos[1] - self.vel_y
-    new_bottomleft = (self.pos[0], newy)
-    rect = self.get_rect(offsetx)  # rect of current pos of player
-    nrect = self.get_rect(offsetx, new_bottomleft)  # rect of new position of player
-    grounded = False
-    ychanged = False
-
-    # check collision with nearby tiles
-    tiles = self.get_nearby_tiles(self.get_center(), 3)
-    if tiles == None:
-      return
-    tile_size = 32
-    for tile in tiles:
-      if tile.type == 1:
-        tile_rect = pg.Rect((tile.pos[0] - offsetx, tile.pos[1]), (tile_size, tile_size))
-        if nrect.colliderect(tile_rect):
-          if rect.bottom <= tile_rect.top:
-            ychanged = True
-            self.set_bottom(tile_rect.top)
-            grounded = True
-            if self.vel_y < 0:
-              self.vel_y = 0
-          elif rect.top >= tile_rect.bottom:
-            ychanged = True
-            self.set_bottom(tile_rect.bottom + rect.height)
-            if self.vel_y > 0:
-              self.vel_y = 0
-    self.grounded = grounded
-    if not ychanged:
-      self.pos[1] = newy
+    left, top, width, height = self.get_body()
+    distance, hit = self.sweep_solids(left, top, width, height, 0, -self.vel_y)
+    self.pos[1] += distance
+    # landing on a tile grounds the entity, hitting a tile from below stops the jump
+    self.grounded = hit and self.vel_y < 0
+    if hit:
+      self.vel_y = 0
 
 
   # updates x position depending on vel_x and checks tile collision
   def update_posx(self, offsetx):
-    newx = self.pos[0] + self.vel_x
-    new_bottomleft = (newx, self.pos[1])
-    rect = self.get_rect(offsetx)  # rect of current pos of player
-    nrect = self.get_rect(offsetx, new_bottomleft)  # rect of new position of player
-    x_changed = False
+    left, top, width, height = self.get_body()
+    distance, hit = self.sweep_solids(left, top, width, height, self.vel_x, 0)
+    self.pos[0] += distance
+    if hit:
+      self.vel_x = 0
+  
 
+  # returns the rect (relative to the screen) of this entity's body, see get_body()
+  def get_rect(self, offsetx, bottomleft=None):
+    left, top, width, height = self.get_body(bottomleft)
+    return pg.Rect(left - offsetx, top, width, height)
 
-    # check collision with nearby tiles
-    tiles = self.get_nearby_tiles(self.get_center(), 3)
-    if tiles == None:
-      return
-    tile_size = 32
-    for tile in tiles:
-      if tile.type == 1:
-        tile_rect = pg.Rect((tile.pos[0] - offsetx, tile.pos[1]), (tile_size, tile_size))
-        if nrect.colliderect(tile_rect):
-          if rect.left >= tile_rect.right:
-            x_changed = True
-            new_left = tile_rect.right+offsetx
-            self.set_left(new_left)
-            if self.vel_x < 0:
-              self.vel_x = 0
-          elif rect.right <= tile_rect.left:
-            x_changed = True
-            new_left = tile_rect.left - rect.width + offsetx
-            self.set_left(new_left)
-            if self.vel_x > 0:
-              self.vel_x = 0
-    if not x_changed:
-      self.pos = [newx, self.pos[1]]
-  
 
-  # returns the rect of this entity
-  # sometimes overridden by subclasses
-  def get_rect(self):
-    return self.rect
+  # returns (left, top, width, height) of this entity's body, as absolute position
+  # bottomleft is where the entity would be, default is self.pos
+  # usually overridden by subclasses, since the body is smaller than the image
+  def get_body(self, bottomleft=None):
+    if bottomleft == None:
+      bottomleft = self.pos
+    return (bottomleft[0], bottomleft[1] - self.rect.height, self.rect.width, self.rect.height)
   
 
   # sets the left position of this entity
@@ -168,10 +145,25 @@ class Entity(pg.sprite.Sprite):
     self.pos[1] = bottom
 
 
+  # saves the current position as the position at the start of a simulation step
+  def save_prev_pos(self):
+    self.prev_pos[0] = self.pos[0]
+    self.prev_pos[1] = self.pos[1]
+
+
+  # returns how far the position drawn on screen is from self.pos
+  # alpha is how far between the last simulation step and the next the frame is drawn (0 = last step, 1 = next step)
+  # the entity is drawn between prev_pos and pos, so movement looks smooth when frames and steps don't line up
+  def get_draw_offset(self, alpha=1):
+    return ((self.prev_pos[0] - self.pos[0]) * (1-alpha), (self.prev_pos[1] - self.pos[1]) * (1-alpha))
+
+
   # updates the rectangle depending on self.pos
-  def update_rect(self, offsetx):
-    self.rect.bottom = self.pos[1]
-    self.rect.left = self.pos[0] - offsetx
+  # alpha interpolates the position between simulation steps (see get_draw_offset())
+  def update_rect(self, offsetx, alpha=1):
+    draw_offset = self.get_draw_offset(alpha)
+    self.rect.bottom = self.pos[1] + draw_offset[1]
+    self.rect.left = self.pos[0] + draw_offset[0] - offsetx
 
 
   # changes state of entity
@@ -228,10 +220,9 @@ class Entity(pg.sprite.Sprite):
       
     if self.direction:
       self.image = self.animation_ref[self.state][0][self.animation_step%self.animation_ref[self.state][2]]
-      self.mask = pg.mask.from_surface(self.image)
     else:
       self.image = self.animation_ref[self.state][1][self.animation_step%self.animation_ref[self.state][2]]
-      self.mask = pg.mask.from_surface(self.image)
+    self.mask = self.resources.get_mask(self.image)
     self.animation_step += 1
     
 
@@ -248,16 +239,16 @@ class Entity(pg.sprite.Sprite):
     self.vel_x = 0
     self.attack_sound_played = False
 
-    # create hitbox for attack
-    hitbox_y = self.pos[1] + self.image_length*0.2
-    hitbox_width = self.image_length*0.3
-    hitbox_height = self.image_length*0.5
-    if self.direction:
-      hitbox_x = self.pos[0] + self.image_length*0.5
-    else:
-      hitbox_x = self.pos[0] - self.image_length*0.35
-      
-    self.attack_hitbox = pg.Rect(hitbox_x, hitbox_y, hitbox_width, hitbox_height)
+
+  # returns the rect (relative to the screen) that the attack can hit, or None if the attack isn't active
+  # the hitbox depends on which frame of the attack animation is shown, frames without a hitbox can't hit
+  def get_hitbox(self, offsetx):
+    if not self.active_attack:
+      return None
+    frame = (self.animation_step-1) % self.animation_ref["attack"][2]  # animation_step is already on the next frame
+    if frame not in self.attack_hitboxes:
+      return None
+    return get_attack_hitbox(self.attack_hitboxes[frame], self.image, self.pos, self.direction, offsetx)
 
 
   # handle states
@@ -357,6 +348,8 @@ class Entity(pg.sprite.Sprite):
   def collide_type(self, offsetx, type):
     rect = self.get_rect(offsetx)  # rect of current pos of player
     tiles = self.get_nearby_tiles(self.get_center(), 3)
+    if tiles == None:  # entity is outside of the map, e.g. falling through a gap in an endless map
+      return None
 
     # try to treat type as a list of types
     try:
@@ -377,7 +370,7 @@ class Entity(pg.sprite.Sprite):
 
 
 # healthbar that appears above entities
-# healthbar is drawn on parent, but attached to entity
+# healthbar is drawn on parent by a HealthbarOverlay, but attached to entity
 class Healthbar:
   def __init__(self, parent, entity, player=False):
     self.parent = parent
@@ -385,56 +378,105 @@ class Healthbar:
     self.player = player
 
     self.size = (80, 4)
-    self.font = pg.font.Font(None, 20)
 
-  # draw healthbar+text
-  def render(self):
-    self.render_bar()
-    self.render_text()
 
+  # whether the healthbar needs to be drawn
+  # enemies that haven't been hit and haven't noticed the player yet don't show their healthbar
+  def is_shown(self):
+    return self.player or self.entity.active or self.entity.health < self.entity.max_health
 
-  # render the bar depending on position of entity this healthbar is attached to
-  def render_bar(self):
+
+  # returns the rect of the bar depending on position of entity this healthbar is attached to
+  def get_pos(self):
     y_margin = 4
-    self.pos = pg.Rect((0, 0), self.size)
+    pos = pg.Rect((0, 0), self.size)
     if not self.player:
-      self.pos.centerx = self.entity.rect.centerx
+      pos.centerx = self.entity.rect.centerx
     else:
-      self.pos.centerx = self.entity.get_centerx(absolute=False)
+      pos.centerx = self.entity.get_centerx(absolute=False)
       
-    self.pos.bottom = self.entity.rect.top + y_margin
+    pos.bottom = self.entity.rect.top + y_margin
+    return pos
 
-    # percentage that the healthbar is filled
-    try:
-      percent_filled = self.entity.health / self.entity.max_health
-    except ZeroDivisionError:
-      percent_filled = 0
-      
-    healthbar_width = self.size[0]*percent_filled
-    healthbar_pos = self.pos.copy()
-    healthbar_pos.width = healthbar_width
-    
-    pg.draw.rect(self.parent, "black", self.pos)
-    pg.draw.rect(self.parent, "green", healthbar_pos)
-
-
-  # render the health text
-  def render_text(self):
-    health = self.entity.health
-    if health < 0:
-      health = 0
-    text_content = str(health)
-    text = self.font.render(text_content, True, "black")
-    text_pos = text.get_rect(centerx=self.pos.centerx, bottom=self.pos.top+3)
-    
-    self.parent.blit(text, text_pos)
 
 
 
+# draws the healthbars of all entities in one pass
+# each (health, max health) pair is rendered once into a surface holding the bar and the health text
+class HealthbarOverlay:
+  def __init__(self, parent):
+    self.parent = parent
+    self.font = text.get_font(None, 20)
+    self.surfaces = {}  # (health, max health, bar size) -> (surface, offset of surface from topleft of bar)
+
+
+  # returns the pre-rendered bar+text surface for a health value, rendering it the first time it is asked for
+  def get_surface(self, health, max_health, size):
+    key = (health, max_health, size)
+    if key not in self.surfaces:
+      # percentage that the healthbar is filled
+      try:
+        percent_filled = health / max_health
+      except ZeroDivisionError:
+        percent_filled = 0
+      health_text = text.render(self.font, str(max(health, 0)), True, "black")
+
+      # text is centered above the bar, overlapping it slightly
+      text_pos = (size[0]//2 - health_text.get_width()//2, 3 - health_text.get_height())
+      offset = (min(text_pos[0], 0), min(text_pos[1], 0))
+      surface_size = (max(size[0], text_pos[0] + health_text.get_width()) - offset[0], size[1] - offset[1])
+      surface = pg.Surface(surface_size, pg.SRCALPHA).convert_alpha()
+      surface.fill((0, 0, 0, 0))
+
+      bar_pos = pg.Rect((-offset[0], -offset[1]), size)
+      healthbar_pos = bar_pos.copy()
+      healthbar_pos.width = max(size[0]*percent_filled, 0)
+      pg.draw.rect(surface, "black", bar_pos)
+      pg.draw.rect(surface, "green", healthbar_pos)
+      surface.blit(health_text, (text_pos[0] - offset[0], text_pos[1] - offset[1]))
+      self.surfaces[key] = (surface, offset)
+    return self.surfaces[key]
+
+
+  # draws the healthbars of the given sprites that are shown and on screen
+  def draw(self, sprites):
+    screen_rect = self.parent.get_rect()
+    blits = []
+    for sprite in sprites:
+      healthbar = sprite.healthbar
+      if not healthbar.is_shown():
+        continue
+      pos = healthbar.get_pos()
+      surface, offset = self.get_surface(sprite.health, sprite.max_health, healthbar.size)
+      rect = surface.get_rect(topleft=(pos.left + offset[0], pos.top + offset[1]))
+      if rect.colliderect(screen_rect):
+        blits.append((surface, rect))
+    self.parent.blits(blits, False)
+
+
+
+
+# returns the rect (relative to the screen) of an attack hitbox
+# hitboxes are (x, y, width, height) relative to the top left of an image facing right, and are mirrored for images facing left
+def get_attack_hitbox(hitbox, image, bottomleft, direction, offsetx):
+  x, y, width, height = hitbox
+  if not direction:
+    x = image.get_width() - x - width
+  return pg.Rect(bottomleft[0] + x - offsetx, bottomleft[1] - image.get_height() + y, width, height)
+
+
+# attack hitboxes of the player, format -> frame of attack animation: hitbox (see get_attack_hitbox())
+# each hitbox covers the part of the axe in front of the player's body (get_rect()) in that frame
+PLAYER_ATTACK_HITBOXES = {
+  2: (40, 40, 10, 46),
+  3: (50, 26, 28, 66),
+  4: (50, 52, 40, 44)
+}
+
 
 # Class for the user-controlled player
 class Player(Entity):
-  def __init__(self, parent, resources, end_game, get_nearby_tiles):
+  def __init__(self, parent, resources, end_game, get_nearby_tiles, sweep_solids):
 
     # callback method when player dies to end the game
     self.end_game = end_game
@@ -456,6 +498,7 @@ class Player(Entity):
 
     # managing attack
     active_attack_frames = [3, 4]
+    self.attack_hitboxes = PLAYER_ATTACK_HITBOXES
     self.attack_recovery = 1200 # time it takes to recover after finishing attack
     self.last_attack = 0  # time of last attack
 
@@ -463,7 +506,7 @@ class Player(Entity):
     self.jump_count = 0
     self.jump_ability = 1  # how many jumps the player can make in the air
     self.jump_power = 12 # how high the player can jump in 1 jump
-    super().__init__(parent, resources, init_pos, 100, 3, 4, active_attack_frames, get_nearby_tiles)
+    super().__init__(parent, resources, init_pos, 100, 3, 4, active_attack_frames, get_nearby_tiles, sweep_solids)
     
     self.healthbar = Healthbar(self.parent, self, player=True)
 
@@ -507,10 +550,12 @@ class Player(Entity):
       if self.direction == 0 and new_direction == 1:
         self.direction = 1
         self.pos[0] += 27 # account for uncentered sprite
+        self.prev_pos[0] += 27  # the shift is not movement, so it isn't interpolated
         self.animate()
       elif self.direction == 1 and new_direction == -1:
         self.direction = 0
         self.pos[0] -= 27 # account for uncentered sprite
+        self.prev_pos[0] -= 27
         self.animate()
 
 
@@ -521,36 +566,24 @@ class Player(Entity):
   
 
   # override begin attack to add attack cooldown
+  # cooldown uses simulated time, so it isn't affected by pauses or slow frames
   def begin_attack(self):
-    cur_time = pg.time.get_ticks()
-    if cur_time - self.last_attack > self.attack_recovery:
+    if self.cur_time - self.last_attack > self.attack_recovery:
       super().begin_attack()
-      self.last_attack = cur_time
+      self.last_attack = self.cur_time
 
 
 
-  # gets rect of the actual player rather than entire sprite (sprite is a huge rectangle)
-  def get_rect(self, offsetx, bottomleft=None):
+  # gets body of the actual player rather than entire sprite (sprite is a huge rectangle)
+  def get_body(self, bottomleft=None):
     # default bottomleft is self.pos
     if bottomleft == None:
-      bottomleft = self.pos.copy()
-    
-    bottomleft = (bottomleft[0]-offsetx, bottomleft[1])
+      bottomleft = self.pos
 
-    # rect position is different depending on which way the player is facing
+    # body position is different depending on which way the player is facing
     if self.direction:
-      rect_bottomleft = (bottomleft[0]+14, bottomleft[1]) # (x, y)
-      rect_size = (36, 64)
-      rect = pg.Rect((0, 0), rect_size)
-      rect.bottomleft = rect_bottomleft
-    else:
-      rect_bottomleft = (bottomleft[0]+45, bottomleft[1]) # (x, y)
-      rect_size = (36, 64)
-      rect = pg.Rect((0, 0), rect_size)
-      rect.bottomleft = rect_bottomleft
-      
-
-    return rect
+      return (bottomleft[0]+14, bottomleft[1]-64, 36, 64)
+    return (bottomleft[0]+45, bottomleft[1]-64, 36, 64)
 
 
   # the sprite is left aligned, so centerx is the x position of the actual player section of the image rather than the entire image
@@ -602,11 +635,32 @@ class Player(Entity):
   
 
 
+# (health, speed) of enemies for each difficulty
+ENEMY_STATS = {
+  "easy": (2, 2),
+  "okay": (3, 3),
+  "hard": (4, 4)
+}
+
+ENEMY_ACTIVATION_DISTANCE = 300  # enemies become active when the player gets this close
+
+# attack hitboxes of enemies, format -> frame of attack animation: hitbox (see get_attack_hitbox())
+# each hitbox covers the part of the golem's swing in front of its body (get_rect()) in that frame
+ENEMY_ATTACK_HITBOXES = {
+  6: (67, 16, 9, 39),
+  7: (67, 5, 19, 54),
+  8: (67, 17, 39, 46),
+  9: (67, 17, 37, 47)
+}
+
+
 # Class for enemies
 class Enemy(Entity):
-  def __init__(self, parent, resources, init_pos, death_callback, difficulty, get_nearby_tiles):
+  def __init__(self, parent, resources, init_pos, death_callback, difficulty, get_nearby_tiles, sweep_solids, get_flow_direction):
 
     self.death_callback = death_callback
+    self.get_flow_direction = get_flow_direction # method to get the direction leading to the player from a position
+    self.pool = None # pool the enemy goes back to when it dies, set by enemy_pool.EnemyPool
     
     # animation_ref contains a tuple for each state
     # format -> state: (image, reverse image, frames)
@@ -621,19 +675,12 @@ class Enemy(Entity):
 
     # attack variables
     active_attack_frames = [7, 8, 9] # which frames in attack animation is the attack hitbox actually active
+    self.attack_hitboxes = ENEMY_ATTACK_HITBOXES
     self.attack_recovery = 800 # time it takes to recover after finishing attack
 
     # health/speed changes depending on difficulty
-    if difficulty == "easy":
-      health = 2
-      speed = 2
-    elif difficulty == "okay":
-      health = 3
-      speed = 3
-    if difficulty == "hard":
-      health = 4
-      speed = 4
-    super().__init__(parent, resources, init_pos, 50, health, speed, active_attack_frames, get_nearby_tiles)
+    health, speed = ENEMY_STATS[difficulty]
+    super().__init__(parent, resources, init_pos, 50, health, speed, active_attack_frames, get_nearby_tiles, sweep_solids)
 
     # load sounds
     self.attack_sound = resources["swing.mp3"]
@@ -644,13 +691,29 @@ class Enemy(Entity):
     self.active = False # whether enemy is active or not
 
 
+  # brings the enemy back to life at pos, so a dead enemy can be reused instead of creating a new one
+  def reset(self, pos, difficulty):
+    health, speed = ENEMY_STATS[difficulty]
+    self.reset_state(pos, health, speed)
+    self.active = False
+
+
+  # sets the methods the enemy uses to interact with the game it is in
+  # pooled enemies can be reused in a different game than the one they were created in
+  def bind(self, death_callback, get_nearby_tiles, sweep_solids, get_flow_direction):
+    self.death_callback = death_callback
+    self.get_nearby_tiles = get_nearby_tiles
+    self.sweep_solids = sweep_solids
+    self.get_flow_direction = get_flow_direction
+
+
   # called once per tick
   def update(self, cur_time, offsetx, player_centerx):
     self.player_centerx = player_centerx
 
     # activate upon getting close to player
     if not self.active:
-      if abs(self.pos[0]-self.player_centerx) < 300:
+      if abs(self.pos[0]-self.player_centerx) < ENEMY_ACTIVATION_DISTANCE:
         self.active = True
 
     # once active, update normally
@@ -671,22 +734,12 @@ class Enemy(Entity):
   
 
 
-  # gets rect of the actual enemy rather than entire sprite (sprite is a huge rectangle)
-  def get_rect(self, offsetx, bottomleft=None):
+  # gets body of the actual enemy rather than entire sprite (sprite is a huge rectangle)
+  def get_body(self, bottomleft=None):
     # default bottomleft is self.pos
     if bottomleft == None:
-      bottomleft = self.pos.copy()
-    
-    # change bottomleft to screen-relative position rather than absolute position
-    bottomleft = (bottomleft[0]-offsetx, bottomleft[1])
-
-    rect_bottomleft = (bottomleft[0]+41, bottomleft[1]-4) # (x, y)
-    rect_size = (26, 53)
-    rect = pg.Rect((0, 0), rect_size)
-    rect.bottomleft = rect_bottomleft
-      
-
-    return rect
+      bottomleft = self.pos
+    return (bottomleft[0]+41, bottomleft[1]-57, 26, 53)
   
 
   # methods that get/set positioning
@@ -703,18 +756,30 @@ class Enemy(Entity):
 
 
   # moves towards the player's location
+  # follows the map's flow field, so enemies walk around walls and only walk off ledges that lead to the player
   def move_to_player(self, distance):
-    if distance > 1:
-      self.move_direction = 1
-    elif distance < -1:
-      self.move_direction = -1
-    else:
-      self.move_direction = 0
+    direction = self.get_flow_direction((self.pos[0]+54, self.pos[1]-4))  # bottom middle of body
+
+    # without a flow field, move straight towards the player
+    if direction == None:
+      if distance > 1:
+        self.move_direction = 1
+      elif distance < -1:
+        self.move_direction = -1
+      else:
+        self.move_direction = 0
+
+    # enemies over the edge of a ledge keep going until they fall
+    elif direction != flow_field.AIR:
+      self.move_direction = direction
 
 
   # called upon death
+  # pooled enemies go back to their pool to be reused
   def kill(self):
     self.death_callback()
     super().kill()
+    if self.pool != None:
+      self.pool.release(self)
 
     
\ No newline at end of file
@@ -0,0 +1,155 @@
+# Flow field that leads enemies to the player through the cells of a tilemap they can stand in.
+# When the player moves to a new cell, the direction to move in from every cell is worked out at once with a breadth first search from the player's cell,
+# so each enemy only looks up the direction of the cell it is in, and the cost doesn't grow with the number of enemies.
+# Enemies can't jump, so from each cell they can only walk to the cell next to it, or walk off a ledge and land below.
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# directions in a field
+LEFT = -1
+STAY = 0  # the cell is the target, or the target can't be reached from it
+RIGHT = 1
+AIR = 2  # the cell can't be stood in (e.g. over the edge of a ledge), enemies keep moving the way they were going
+
+worker = None  # thread that fields are worked out on, shared by every flow field (see get_worker())
+
+
+# returns the worker thread, starting it the first time it is needed
+def get_worker():
+    global worker
+    if worker == None:
+        worker = ThreadPoolExecutor(max_workers=1)
+    return worker
+
+
+# returns the graph of cells enemies can stand in, as (standing, landing, sources)
+# standing is a 2d bool array, a cell can be stood in if it and the cell above it are empty and the cell below it is ground
+# landing is the row of the standing cell that something falling from each cell lands in, or -1 if it can't land
+# sources maps each standing cell to a list of (cell, direction) that lead to it
+def build_graph(tilemap):
+    solid = tilemap == 1
+    free = ~solid
+    cols, rows = solid.shape
+    standing = np.zeros((cols, rows), dtype=bool)
+    standing[:, 1:rows-1] = free[:, 1:rows-1] & free[:, :rows-2] & solid[:, 2:]
+
+    # worked out from the bottom up, falling stops at a standing cell and can't pass through ground
+    landing = np.full((cols, rows), -1, dtype=np.int64)
+    for k in range(rows-1, -1, -1):
+        below = landing[:, k+1] if k+1 < rows else -1
+        landing[:, k] = np.where(standing[:, k], k, np.where(free[:, k], below, -1))
+
+    # from each standing cell, enemies can move into the next column if there is room for them
+    # they land in the next column's cell if it can be stood in, otherwise they fall until they land
+    sources = {}
+    for i, k in np.argwhere(standing).tolist():
+        for direction in (LEFT, RIGHT):
+            n = i + direction
+            if 0 <= n < cols and free[n, k] and free[n, k-1] and landing[n, k] >= 0:
+                sources.setdefault((n, int(landing[n, k])), []).append(((i, k), direction))
+    return standing, landing, sources
+
+
+# returns the field of directions leading to target (a standing cell) from every cell
+def compute_field(graph, target):
+    standing, landing, sources = graph
+    field = np.where(standing, STAY, AIR).astype(np.int8)
+    reached = {target}
+    queue = deque([target])
+    while queue:
+        cell = queue.popleft()
+        for source, direction in sources.get(cell, ()):
+            if source not in reached:
+                reached.add(source)
+                field[source] = direction
+                queue.append(source)
+    return field
+
+
+class FlowField:
+    def __init__(self, tile_size, use_worker=False):
+        self.tilemap = None  # 2d array of tile types, set by load_tilemap()
+        self.first_col = 0  # column of the map that index 0 of the tilemap is
+        self.tile_size = tile_size
+        self.use_worker = use_worker  # whether fields are worked out on the worker thread instead of during update()
+        self.graph = None  # built when it is first needed, see build_graph()
+        self.field = None  # direction to move in from each cell, None until the first field is worked out
+        self.target = None  # cell the field leads to
+        self.pending = None  # future of the field being worked out on the worker thread
+
+
+    # first_col is the column of the map that index 0 of tilemap is, for streamed maps
+    def load_tilemap(self, tilemap, first_col=0):
+        self.tilemap = tilemap
+        self.first_col = first_col
+        self.invalidate()
+        # fields of the old tilemap don't line up with the new one
+        self.field = None
+        self.pending = None
+
+
+    # called when ground tiles change, the graph is rebuilt and the field worked out again on the next update
+    def invalidate(self):
+        self.graph = None
+        self.target = None
+
+
+    # returns the index of the cell pos (absolute position of the bottom of a body) is in
+    def get_cell(self, pos):
+        return (int(pos[0] // self.tile_size) - self.first_col, int((pos[1]-1) // self.tile_size))
+
+
+    # works out the field again if the player moved to a different cell
+    # pos is the absolute position of the bottom middle of the player
+    def update(self, pos):
+        if self.pending != None and self.pending.done():
+            self.field = self.pending.result()
+            self.pending = None
+
+        if self.graph == None:
+            self.graph = build_graph(self.tilemap)
+
+        # the target is the cell the player lands in, so enemies go under the player while they are jumping
+        # if the player is over a pit, the field keeps leading to the last cell they were in
+        i, k = self.get_cell(pos)
+        landing = self.graph[1]
+        if not 0 <= i < landing.shape[0]:
+            return
+        k = min(max(k, 0), landing.shape[1]-1)
+        if landing[i, k] < 0:
+            return
+        target = (i, int(landing[i, k]))
+        if target == self.target:
+            return
+
+        if not self.use_worker:
+            self.target = target
+            self.field = compute_field(self.graph, target)
+        # only one field is worked out at a time, the newest target is started on a later update
+        elif self.pending == None:
+            self.target = target
+            self.pending = get_worker().submit(compute_field, self.graph, target)
+
+
+    # returns the direction to move in from the cell pos (absolute position of the bottom of a body) is in
+    # returns None if there is no field yet
+    def get_direction(self, pos):
+        if self.field is None:
+            return None
+        i, k = self.get_cell(pos)
+        if 0 <= i < self.field.shape[0] and 0 <= k < self.field.shape[1]:
+            return int(self.field[i, k])
+        return AIR
+
+
+    # returns the directions to move in from the cells of many positions at once, like get_direction()
+    # xs and ys are arrays of absolute positions of the bottom of bodies
+    def get_directions(self, xs, ys):
+        i = np.floor(xs / self.tile_size).astype(np.int64) - self.first_col
+        k = np.floor((ys-1) / self.tile_size).astype(np.int64)
+        in_map = (i >= 0) & (i < self.field.shape[0]) & (k >= 0) & (k < self.field.shape[1])
+        directions = np.full(len(xs), AIR, dtype=np.int8)
+        directions[in_map] = self.field[i[in_map], k[in_map]]
+        return directions
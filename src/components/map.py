@@ -1,69 +1,268 @@
+from collections import OrderedDict
+import numpy as np
 import pygame as pg
+from . import autotile, flow_field
+
+CHUNK_SIZE = 16  # columns in each baked chunk of the tile layer
+CHUNK_CACHE_SIZE = 8  # baked chunks kept at once, more than fit on screen
 
 class Map:
-    def __init__(self, parent, resources, tile_size, map_data):
+    def __init__(self, parent, resources, tile_size, map_data, flow_field_worker=False):
         self.parent = parent
         self.resources = resources
         self.tile_size = tile_size
-        self.tilemap = None
+        self.tilemap = None  # 2d uint8 array of tile types, indexed [column, row]
+        # streamed maps only keep some columns in memory (see append_columns() and drop_columns())
+        # index 0 of the tilemap is column first_col of the map, positions passed to the map are still absolute
+        self.first_col = 0
+        self.masks = None  # 2d array of the autotile neighbour mask of each tile
+
+        # the static tile layer is baked into surfaces that are chunk_size columns wide
+        # chunks are only baked when they are first drawn, and rebaked when one of their tiles changes
+        # the least recently drawn chunks are dropped past CHUNK_CACHE_SIZE, so memory doesn't grow with the width of the map
+        self.chunk_size = CHUNK_SIZE
+        self.chunk_count = 0  # number of chunks in the map, baked or not
+        self.chunks = OrderedDict()  # chunk index -> baked surface, least recently drawn first
+        self.dirty_chunks = set()  # indexes of baked chunks that need to be rebaked
+
+        # ground tiles are merged into larger rects for collision
+        # rects are built per block of collision_block_size columns, so a changed tile only rebuilds its block
+        self.collision_block_size = 8
+        self.solid_buckets = []  # for each column, the merged rects (absolute position) that overlap it
+
+        # directions leading enemies to the player, see update_flow_field()
+        self.flow_field = flow_field.FlowField(tile_size, flow_field_worker)
+
         self.load_tilemap(map_data["tilemap"])
         self.width = map_data["width"]  # number of backgrounds this map is wide
 
         self.bg_img = self.resources["bg.png"]
         self.pixel_width = self.width * self.bg_img.get_width() # total width of background in pixels
+        self.pixel_left = 0  # left side of the map, only changes for streamed maps
+        # streamed maps end at their last loaded column instead, see streamer.ChunkStreamer
+        # they are drawn with enough backgrounds to cover every loaded column, like in append_columns()
+        if map_data.get("streamed"):
+            self.pixel_width = self.tilemap.shape[0] * self.tile_size
+            self.width = -(-self.pixel_width // self.bg_img.get_width())
 
 
-    # tilemap argument is a 2d array of tiles
-    # it loads the data from the tilemap into Tile objects and creates a new tilemap
+    # tilemap argument is a 2d array (or nested list) of tile types
+    # tiles are stored as a compact array, Tile objects are only created when they are asked for
     def load_tilemap(self, tilemap):
-        # topleft is the topleft corner of where the tiles start rendering relative to the topleft of the screen
-        topleft = [0, 0]
-        pos = topleft.copy()
-
-        # transform json tilemap into 2d list with tile objects
-        new_tilemap = []
-        for i in range(len(tilemap)):
-            col = []
-            for k in range(len(tilemap[i])):
-                tile_type = tilemap[i][k]
-                tile = Tile(self.resources, type=tile_type, list_pos=(i, k), pos=(pos[0], pos[1]))
-                col.append(tile)
-                pos[1] += self.tile_size
-            new_tilemap.append(col)
-            pos[1] = topleft[1]
-            pos[0] += int(self.tile_size)
-
-        for col in new_tilemap:
-            for tile in col:
-                tile.load_image(new_tilemap)
-
-        self.tilemap = new_tilemap
+        self.tilemap = np.array(tilemap, dtype=np.uint8)
+        self.reset_chunks(self.tilemap.shape[0])
+
+        # autotile every ground tile at once using the neighbour masks of the whole map
+        self.masks = autotile.compute_masks(self.tilemap == 1)
+        self.flow_field.load_tilemap(self.tilemap, self.first_col)
+
+        self.solid_buckets = [[] for i in range(self.tilemap.shape[0])]
+        for block in range(-(-self.tilemap.shape[0] // self.collision_block_size)):
+            self.build_collision_block(block)
+
+
+    # changes the type of the tile at list_pos
+    # recomputes the images of the tile and its 8 neighbours and marks their chunks to be rebaked
+    # returns whether the type was changed
+    def set_tile_type(self, list_pos, new_type):
+        i, k = list_pos
+        old_type = self.tilemap[i, k]
+        if old_type == new_type:
+            return False
+        self.tilemap[i, k] = new_type
+
+        cols, rows = self.tilemap.shape
+        i0, i1 = max(i-1, 0), min(i+2, cols)
+        k0, k1 = max(k-1, 0), min(k+2, rows)
+        self.masks[i0:i1, k0:k1] = autotile.compute_region_masks(self.tilemap == 1, i0, i1, k0, k1)
+        for col in range(i0, i1):
+            self.invalidate_tile((col, k))
+
+        # only ground tiles are solid, so other changes don't affect collision
+        if old_type == 1 or new_type == 1:
+            self.build_collision_block(i // self.collision_block_size)
+            self.flow_field.invalidate()
+        return True
+
+
+    # changes every tile of type old_type to new_type at once
+    # e.g., used when clearing enemy tiles after spawning enemies
+    def replace_type(self, old_type, new_type):
+        changed = self.tilemap == old_type
+        self.tilemap[changed] = new_type
+        changed_cols = np.unique(np.nonzero(changed)[0]).tolist()
+        if old_type == 1 or new_type == 1:
+            self.masks = autotile.compute_masks(self.tilemap == 1)
+            for block in set(i // self.collision_block_size for i in changed_cols):
+                self.build_collision_block(block)
+            self.flow_field.invalidate()
+        for i in changed_cols:
+            self.invalidate_tile((i, 0))
+
+
+    # adds columns (2d array of tile types, indexed [column, row]) to the right side of a streamed map
+    # the number of columns must be a multiple of chunk_size, so chunks and collision blocks line up with the tilemap
+    def append_columns(self, columns):
+        old_cols = self.tilemap.shape[0]
+        self.tilemap = np.concatenate((self.tilemap, np.asarray(columns, dtype=np.uint8)))
+        cols, rows = self.tilemap.shape
+
+        # the last old column gets new neighbours, so its autotile mask is recomputed with the new columns
+        self.masks = np.concatenate((self.masks[:old_cols-1], autotile.compute_region_masks(self.tilemap == 1, old_cols-1, cols, 0, rows)))
+        self.invalidate_tile((old_cols-1, 0))
+        self.chunk_count += (cols - old_cols) // self.chunk_size
+
+        self.solid_buckets.extend([] for i in range(cols - old_cols))
+        for block in range(old_cols // self.collision_block_size, cols // self.collision_block_size):
+            self.build_collision_block(block)
+        self.flow_field.load_tilemap(self.tilemap, self.first_col)
+
+        self.pixel_width = (self.first_col + cols) * self.tile_size
+        self.width = -(-self.pixel_width // self.bg_img.get_width())
+
+
+    # removes columns from the left side of a streamed map, freeing their tiles, chunks and collision rects
+    # the number of columns must be a multiple of chunk_size, see append_columns()
+    def drop_columns(self, count):
+        # arrays are copied, so the memory of the dropped columns is freed
+        self.tilemap = self.tilemap[count:].copy()
+        self.masks = self.masks[count:].copy()
+        dropped_chunks = count // self.chunk_size
+        self.chunks = OrderedDict((i - dropped_chunks, chunk) for i, chunk in self.chunks.items() if i >= dropped_chunks)
+        self.dirty_chunks = set(i - dropped_chunks for i in self.dirty_chunks if i >= dropped_chunks)
+        self.chunk_count -= dropped_chunks
+        del self.solid_buckets[:count]
+        self.first_col += count
+        self.flow_field.load_tilemap(self.tilemap, self.first_col)
+        self.pixel_left = self.first_col * self.tile_size
+
+
+    # rebuilds the merged collision rects for the columns in a block
+    # vertical runs of ground tiles in each column are merged with identical runs in the columns next to them
+    def build_collision_block(self, block):
+        first_col = block * self.collision_block_size
+        last_col = min(first_col + self.collision_block_size, self.tilemap.shape[0])
+        for i in range(first_col, last_col):
+            self.solid_buckets[i] = []
+
+        open_rects = {}  # (top row, bottom row) of a run -> rect that can still be extended to the right
+        for i in range(first_col, last_col):
+            next_open_rects = {}
+            for run in self.get_solid_runs(i):
+                rect = open_rects.get(run)
+                if rect != None:
+                    rect.width += self.tile_size
+                else:
+                    height = (run[1] - run[0]) * self.tile_size
+                    rect = pg.Rect((self.first_col+i)*self.tile_size, run[0]*self.tile_size, self.tile_size, height)
+                next_open_rects[run] = rect
+                # rect is bucketed into every column it spans
+                self.solid_buckets[i].append(rect)
+            open_rects = next_open_rects
+
+
+    # returns the (top row, bottom row + 1) of every vertical run of ground tiles in column i
+    def get_solid_runs(self, i):
+        solid = np.concatenate(([0], (self.tilemap[i] == 1).astype(np.int8), [0]))
+        edges = np.nonzero(np.diff(solid))[0].tolist()
+        return list(zip(edges[0::2], edges[1::2]))
+
+
+    # returns the image for the tile at column i, row k
+    def get_tile_image(self, i, k):
+        tile_type = self.tilemap[i, k]
+        if tile_type == 1:
+            return self.resources[autotile.LOOKUP_TABLE[self.masks[i, k]]]
+        elif tile_type in TILE_IMAGES:
+            return self.resources[TILE_IMAGES[tile_type]]
+        return None
+
+
+    # drops every baked chunk of the map, chunks are baked again when they are drawn
+    def reset_chunks(self, cols):
+        self.chunk_count = -(-cols // self.chunk_size)  # round up so the last partial chunk is included
+        self.chunks = OrderedDict()
+        self.dirty_chunks = set()
+
+
+    # marks the chunk containing the tile at list_pos to be rebaked, if it has been baked
+    def invalidate_tile(self, list_pos):
+        index = list_pos[0] // self.chunk_size
+        if index in self.chunks:
+            self.dirty_chunks.add(index)
+
+
+    # returns the baked surface of a chunk, baking it if it isn't cached or one of its tiles changed
+    # when the cache is full, the surface of the least recently drawn chunk is reused
+    def get_chunk(self, index):
+        chunk = self.chunks.get(index)
+        if chunk == None:
+            if len(self.chunks) >= CHUNK_CACHE_SIZE:
+                old_index, chunk = self.chunks.popitem(last=False)
+                self.dirty_chunks.discard(old_index)
+            else:
+                chunk = pg.Surface((self.chunk_size * self.tile_size, self.tilemap.shape[1] * self.tile_size), pg.SRCALPHA).convert_alpha()
+            self.chunks[index] = chunk
+            self.bake_chunk(index)
+        elif index in self.dirty_chunks:
+            self.bake_chunk(index)
+        self.chunks.move_to_end(index)
+        return chunk
+
+
+    # draws every tile in a chunk onto the chunk's surface
+    def bake_chunk(self, index):
+        chunk = self.chunks[index]
+        chunk.fill((0, 0, 0, 0))
+        first_col = index * self.chunk_size
+        cols, rows = np.nonzero(self.tilemap[first_col:first_col+self.chunk_size])
+        for i, k in zip(cols.tolist(), rows.tolist()):
+            image = self.get_tile_image(first_col+i, k)
+            if image != None:
+                chunk.blit(image, (i*self.tile_size, k*self.tile_size))
+            else:
+                print("Invalid tile type:", self.tilemap[first_col+i, k])
+        self.dirty_chunks.discard(index)
 
 
     # draw the tilemap onto the screen
+    # only the chunks that are visible on screen are drawn
     def draw(self, offsetx):
         self.draw_background(offsetx)
-        for col in self.tilemap:
-            for tile in col:
-                tile.draw(self.parent, offsetx)
+        chunk_width = self.chunk_size * self.tile_size
+        first_chunk, last_chunk = self.get_visible_range(offsetx - self.pixel_left, chunk_width, self.chunk_count)
+        for i in range(first_chunk, last_chunk):
+            self.parent.blit(self.get_chunk(i), (i * chunk_width + self.pixel_left - offsetx, 0))
 
 
     # draws the background
+    # only the background panels that are visible on screen are drawn
     def draw_background(self, offsetx):
-        for i in range(self.width):
-            posx = i * self.bg_img.get_width() - offsetx
+        bg_width = self.bg_img.get_width()
+        first_bg, last_bg = self.get_visible_range(offsetx, bg_width, self.width)
+        for i in range(first_bg, last_bg):
+            posx = i * bg_width - offsetx
             self.parent.blit(self.bg_img, (posx, 0))
 
 
-    # gets the index of the tile that pos is on
+    # returns the range (first, last + 1) of items of size item_width that are visible on screen
+    # count is the total number of items, so the range never goes outside of the map
+    def get_visible_range(self, offsetx, item_width, count):
+        first = int(offsetx // item_width)
+        last = int((offsetx + self.parent.get_width()) // item_width) + 1
+        return max(first, 0), min(last, count)
+
+
+    # gets the tile that pos is on, or None if pos is outside of the map
+    # entities look up tiles every step, so positions above or below the map (e.g., jumping or falling through a gap) are expected
     def get_tile(self, pos):
-        try:
-            tile = self.tilemap[int(pos[0]/self.tile_size)][int(pos[1]/self.tile_size)] # index of closest tile to pos
-        except IndexError:
-            print("Tile out of tilemap range.")
-            tile = None
-        return tile
-    
+        list_pos = (int(pos[0]//self.tile_size) - self.first_col, int(pos[1]//self.tile_size)) # index of closest tile to pos
+        # negative indexes are checked too, numpy would wrap them around to the other side of the map
+        cols, rows = self.tilemap.shape
+        if not (0 <= list_pos[0] < cols and 0 <= list_pos[1] < rows):
+            return None
+        return Tile(self, list_pos)
+
 
     # returns a list of all nearby tiles
     # pos is the position to find tiles nearby
@@ -76,18 +275,78 @@ class Map:
         tile_index = tile.list_pos
         # next, search around the tile
         t = (tile_index[0]-radius+1, tile_index[1]-radius+1) # top left tile in search radius
+        cols, rows = self.tilemap.shape
         for i in range(2*radius-1):
             for k in range(2*radius-1):
-                try:
-                  nearby_tiles.append(self.tilemap[t[0]+i][t[1]+k])
-                except IndexError:
-                  pass
-        
+                if 0 <= t[0]+i < cols and 0 <= t[1]+k < rows:
+                    nearby_tiles.append(Tile(self, (t[0]+i, t[1]+k)))
+
         return nearby_tiles
 
 
+    # moves a box (absolute position) by dx or dy, stopping at the first ground tile in its way
+    # boxes move along one axis at a time, so only one of dx and dy should be non-zero
+    # the whole path is checked, so a box can't pass through a tile however far it moves in one step
+    # only the collision buckets of columns the path overlaps are read, there is no ground outside of the map
+    # returns (distance moved, whether a ground tile was hit)
+    def sweep(self, left, top, width, height, dx, dy):
+        right = left + width
+        bottom = top + height
+        first_col = max(int(min(left, left+dx) // self.tile_size) - self.first_col, 0)
+        last_col = min(int(max(right, right+dx) // self.tile_size) - self.first_col, len(self.solid_buckets)-1)
+        distance = dx or dy
+        hit = False
+        # rects that span several columns are read more than once, which doesn't change the closest hit
+        for col in range(first_col, last_col+1):
+            for rect in self.solid_buckets[col]:
+                # tiles that only touch the box (or already overlap it) don't block it, like pg.Rect.colliderect()
+                if dx:
+                    if rect.bottom <= top or rect.top >= bottom:
+                        continue
+                    if dx > 0 and right <= rect.left < right + distance:
+                        distance = rect.left - right
+                        hit = True
+                    elif dx < 0 and left + distance < rect.right <= left:
+                        distance = rect.right - left
+                        hit = True
+                else:
+                    if rect.right <= left or rect.left >= right:
+                        continue
+                    if dy > 0 and bottom <= rect.top < bottom + distance:
+                        distance = rect.top - bottom
+                        hit = True
+                    elif dy < 0 and top + distance < rect.bottom <= top:
+                        distance = rect.bottom - top
+                        hit = True
+        return distance, hit
+
+
+
+    # works out the flow field to the player again if they moved to a different tile
+    # pos is the absolute position of the bottom middle of the player
+    def update_flow_field(self, pos):
+        self.flow_field.update(pos)
+
+
+    # returns the direction (flow_field.LEFT, STAY, RIGHT or AIR) an enemy at pos should move in to get to the player
+    # pos is the absolute position of the bottom middle of the enemy's body, returns None if there is no flow field yet
+    def get_flow_direction(self, pos):
+        return self.flow_field.get_direction(pos)
+
 
-# class for an individual tile
+
+# image for each tile type that isn't autotiled
+TILE_IMAGES = {
+    2: "enemy_tile.png",
+    3: "portal1.png",
+    4: "portal2.png",
+    5: "portal3.png",
+    6: "portal4.png"
+}
+
+
+# view of an individual tile in a map
+# tiles don't hold any data of their own, they read and write the tilemap array of the map
 # TILE TYPE REFERENCE:
 # tile.type = 0 | 1 | 2 | 3
 # 0 = empty
@@ -98,114 +357,35 @@ class Map:
 # 5 = portal 3
 # 6 = portal 4
 class Tile:
-    def __init__(self, resources, type, list_pos, pos):
-        # top/right/bottom/left are boolean values that identify the tiles surrounding this tile
-        # e.g., top = True means there is a tile above this one
+    __slots__ = ("map", "list_pos")
 
-        self.resources = resources
-        self.type = type
+    def __init__(self, map, list_pos):
+        self.map = map
         self.list_pos = list_pos # position of tile in tilemap
-        self.pos = pos # absolute pos (topleft)
-
-        self.image = None
-        self.length = 32
-
-
-    # loads image for the tile depending on the tiles surrounding it
-    # init argument is for whether this is the initial loading of the image
-    def load_image(self, tilemap):
-        if self.type == 0:
-            self.image = None
-        
-        elif self.type == 1:
-            surrounding_tiles = self.check_surrounding_tiles(tilemap)
-            top = surrounding_tiles[0]
-            right = surrounding_tiles[1]
-            bottom = surrounding_tiles[2]
-            left = surrounding_tiles[3]
-            if self.type == 1:
-                if top:
-                    self.image = self.resources["Tile_04.png"]
-                elif bottom:
-                    if right:
-                        if left:
-                            self.image = self.resources["Tile_02.png"]
-                        else:
-                            self.image = self.resources["Tile_01.png"]
-                    else:
-                        if left:
-                            self.image = self.resources["Tile_03.png"]
-                        else:
-                            self.image = self.resources["Tile_05.png"]
-                elif right:
-                    if left:
-                        self.image = self.resources["Tile_07.png"]
-                    else:
-                        self.image = self.resources["Tile_06.png"]
-                elif left:
-                    self.image = self.resources["Tile_08.png"]
-                else:
-                    self.image = self.resources["Tile_18.png"]
-        
-        elif self.type == 2:
-            self.image = self.resources["enemy_tile.png"]
-        
-        elif self.type == 3:
-            self.image = self.resources["portal1.png"]
-        elif self.type == 4:
-            self.image = self.resources["portal2.png"]
-        elif self.type == 5:
-            self.image = self.resources["portal3.png"]
-        elif self.type == 6:
-            self.image = self.resources["portal4.png"]
-
-
-    # checks whether tiles surrounding this tile are non-empty using given tilemap
-    def check_surrounding_tiles(self, tilemap):
-        # False = empty, True = filled
-        # e.g., top = False means there is no tile above this tile
-        top = False
-        right = False
-        bottom = False
-        left = False
-        i = self.list_pos[0]
-        k = self.list_pos[1]
-        if i != 0:
-            if tilemap[i-1][k].type == 1:
-                left = True
-        if i != len(tilemap)-1:
-            if tilemap[i+1][k].type == 1:
-                right = True
-        if k != 0:
-            if tilemap[i][k-1].type == 1:
-                top = True
-        if k != len(tilemap[i])-1:
-            if tilemap[i][k+1].type == 1:
-                bottom = True
-
-        return (top, right, bottom, left)
-    
-
-    # draws this tile
-    def draw(self, parent, offsetx):
-        if self.type != 0:
-            pos = (self.pos[0]-offsetx, self.pos[1])
-            if self.type in [1, 2, 3, 4, 5, 6]:
-                parent.blit(self.image, pos)
-            else:
-                print("Invalid tile type:", self.type)
-    
+
+
+    @property
+    def type(self):
+        return int(self.map.tilemap[self.list_pos])
+
+
+    # absolute pos (topleft)
+    @property
+    def pos(self):
+        return ((self.map.first_col+self.list_pos[0])*self.map.tile_size, self.list_pos[1]*self.map.tile_size)
+
+
+    @property
+    def image(self):
+        return self.map.get_tile_image(*self.list_pos)
+
 
     # change the type of this tile
-    def change_type(self, new_type, tilemap):
-        if self.type != new_type:
-            self.type = new_type
-            self.load_image(tilemap)
-            return True  # true means the type was changed
-        return False # false means no change occured
-    
+    # the map updates the images of this tile and its neighbours
+    def change_type(self, new_type):
+        return self.map.set_tile_type(self.list_pos, new_type)  # true means the type was changed
+
 
     def get_rect(self, offsetx):
         if self.type != 0:
-            return self.image.get_rect(left=self.pos[0]-offsetx, top=self.pos[1])
-
+            return pg.Rect((self.pos[0]-offsetx, self.pos[1]), (self.map.tile_size, self.map.tile_size))
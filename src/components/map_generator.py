@@ -0,0 +1,103 @@
+# Generates maps from a seed, instead of drawing them in the map creator.
+# Maps are made of a floor with gaps, raised steps and floating platforms, enemies standing on them, and a portal at the end.
+# Every feature is placed for all columns at once with numpy, so even very wide maps are generated quickly.
+
+import numpy as np
+
+# map entry for a generated map, shown in the map selector like a saved map
+# every game of a generated map with the same seed and width has the same map
+GENERATED_MAP = {"name": "Generated", "generated": True, "seed": 0, "width": 10}
+
+# default chances of each feature, per column (per free tile for enemies)
+PLATFORM_DENSITY = 0.05
+GAP_DENSITY = 0.04
+STEP_DENSITY = 0.04
+ENEMY_DENSITY = 0.02
+
+GAP_WIDTHS = (1, 2)  # narrow enough to jump over
+STEP_WIDTHS = (3, 6)
+PLATFORM_WIDTHS = (3, 8)
+PLATFORM_HEIGHTS = (3, 5)  # tiles above the floor, enough room for the player to walk under
+CLEARANCE = 2  # columns kept between platforms and the gaps and steps under them, so jumps aren't blocked
+SAFE_COLUMNS = 8  # columns at the start of a map that are flat and empty, so the player can get started
+PORTAL_COLUMNS = 4  # columns at the end of a map kept flat for the portal
+
+
+# returns the map data (the same shape as the maps saved by DataHandler.save_map) for a generated map
+# bg_size is the (width, height) of the background image, width is how many backgrounds wide the map is
+def generate_map(bg_size, tile_size, seed, width, name="generated", platform_density=PLATFORM_DENSITY, gap_density=GAP_DENSITY,
+                 step_density=STEP_DENSITY, enemy_density=ENEMY_DENSITY, portal=True):
+    bg_width, bg_height = bg_size
+    cols = int(bg_width*width/tile_size) + 1
+    rows = int(bg_height/tile_size) + 1
+    tilemap = generate_tilemap(seed, cols, rows, platform_density, gap_density, step_density, enemy_density,
+                               SAFE_COLUMNS, PORTAL_COLUMNS if portal else 0)
+    if portal:
+        place_portal(tilemap, cols-3, rows-3)
+
+    return {
+        "name": name,
+        "tilemap": tilemap,
+        "width": width
+    }
+
+
+# returns the tile types (2d array indexed [column, row]) of a generated map without a portal
+# nothing is placed in the first safe_left and last safe_right columns
+# the same seed and arguments always give the same tilemap
+def generate_tilemap(seed, cols, rows, platform_density=PLATFORM_DENSITY, gap_density=GAP_DENSITY, step_density=STEP_DENSITY,
+                     enemy_density=ENEMY_DENSITY, safe_left=SAFE_COLUMNS, safe_right=0):
+    rng = np.random.default_rng(seed)
+    tilemap = np.zeros((cols, rows), dtype=np.uint8)
+    tilemap[:, rows-1] = 1  # floor
+
+    free = np.zeros(cols, dtype=bool)  # columns that features can be placed in
+    free[safe_left:cols-safe_right] = True
+
+    gaps, _ = place_runs(rng, free, gap_density, GAP_WIDTHS)
+    tilemap[gaps, rows-1] = 0
+    # steps are kept away from gaps, so the floor on both sides of a gap is the same height
+    steps, _ = place_runs(rng, free & ~dilate(gaps, cols, 1), step_density, STEP_WIDTHS)
+    tilemap[steps, rows-2] = 1
+    platforms, heights = place_runs(rng, free & ~dilate(np.concatenate((gaps, steps)), cols, CLEARANCE), platform_density, PLATFORM_WIDTHS, PLATFORM_HEIGHTS)
+    tilemap[platforms, rows-1-heights] = 1
+
+    # enemies stand on ground, with room for their body above them
+    ground = tilemap == 1
+    standing = np.zeros((cols, rows), dtype=bool)
+    standing[:, 1:-1] = ~ground[:, :-2] & ~ground[:, 1:-1] & ground[:, 2:]
+    standing &= free[:, None]
+    tilemap[standing & (rng.random((cols, rows)) < enemy_density)] = 2
+    return tilemap
+
+
+# places runs of columns that start in free columns with the chance density, with widths between widths[0] and widths[1]
+# returns the columns of every run, and a value for each column that is the same for all columns of a run (between values[0] and values[1])
+# runs are cut off at the first column that isn't free, and never overlap or touch (e.g., two gaps can't join into a gap too wide to jump)
+def place_runs(rng, free, density, widths, values=(0, 0)):
+    starts = np.flatnonzero(free & (rng.random(len(free)) < density))
+    starts = starts[np.diff(starts, prepend=-widths[1]-1) > widths[1]]  # runs that start within reach of the run before them are dropped
+    run_widths = rng.integers(widths[0], widths[1]+1, len(starts))
+    run_values = rng.integers(values[0], values[1]+1, len(starts))
+
+    # one row per run, one column for each column the widest run could cover
+    offsets = np.arange(widths[1])
+    columns = starts[:, None] + offsets
+    in_run = offsets < run_widths[:, None]
+    # a run ends at the first column that isn't free
+    in_free = free[np.minimum(columns, len(free)-1)] & (columns < len(free))
+    in_run &= np.cumprod(in_free, axis=1, dtype=bool)
+    return columns[in_run], np.broadcast_to(run_values[:, None], columns.shape)[in_run]
+
+
+# returns a column mask of the columns within distance of any of the given columns
+def dilate(columns, cols, distance):
+    mask = np.zeros(cols + 2*distance, dtype=bool)
+    for offset in range(2*distance + 1):
+        mask[columns + offset] = True
+    return mask[distance:cols+distance]
+
+
+# places the 2x2 portal tiles with their top left tile at (i, k), like Map_Creator.place_portal()
+def place_portal(tilemap, i, k):
+    tilemap[i:i+2, k:k+2] = [[3, 5], [4, 6]]
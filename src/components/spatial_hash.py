@@ -0,0 +1,100 @@
+# Uniform grid spatial hash for finding sprites near a position.
+# The world is split into square cells, and each sprite is stored in every cell its rect overlaps.
+# Finding the sprites that might collide with a rect only looks at the cells the rect overlaps, instead of every sprite.
+
+import pygame as pg
+
+CELL_SIZE = 128  # pixels, a bit larger than an enemy sprite so most sprites are in at most 4 cells
+
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell x, cell y) -> set of items in the cell
+        self.item_cells = {}  # item -> range of cells the item is in, as (first x, first y, last x, last y)
+
+
+    # returns the range of cells overlapped by a world rect, as (first x, first y, last x, last y)
+    def get_cell_range(self, left, top, width, height):
+        return (
+            int(left // self.cell_size),
+            int(top // self.cell_size),
+            int((left + width - 1) // self.cell_size),
+            int((top + height - 1) // self.cell_size)
+        )
+
+
+    # adds an item, or moves it if it is already in the hash
+    # items are only moved between cells when the range of cells they overlap changes
+    def move(self, item, left, top, width, height):
+        cell_range = self.get_cell_range(left, top, width, height)
+        if cell_range != self.item_cells.get(item):
+            self.move_to_cells(item, cell_range)
+
+
+    # puts an item in a range of cells, removing it from the cells it was in before
+    def move_to_cells(self, item, cell_range):
+        self.remove(item)
+        self.item_cells[item] = cell_range
+        for cell_x in range(cell_range[0], cell_range[2]+1):
+            for cell_y in range(cell_range[1], cell_range[3]+1):
+                self.cells.setdefault((cell_x, cell_y), set()).add(item)
+
+
+    def remove(self, item):
+        cell_range = self.item_cells.pop(item, None)
+        if cell_range == None:
+            return
+        for cell_x in range(cell_range[0], cell_range[2]+1):
+            for cell_y in range(cell_range[1], cell_range[3]+1):
+                cell = self.cells[(cell_x, cell_y)]
+                cell.discard(item)
+                if not cell:
+                    del self.cells[(cell_x, cell_y)]
+
+
+    # returns a set of the items in the cells overlapped by a world rect
+    # items are only candidates, they still need an exact collision check
+    def query(self, left, top, width, height):
+        first_x, first_y, last_x, last_y = self.get_cell_range(left, top, width, height)
+        found = set()
+        for cell_x in range(first_x, last_x+1):
+            for cell_y in range(first_y, last_y+1):
+                cell = self.cells.get((cell_x, cell_y))
+                if cell:
+                    found |= cell
+        return found
+
+
+
+# sprite group that keeps its sprites in a SpatialHash
+# sprites are added to/removed from the hash with the group (including when they are killed)
+# update_positions() must be called after sprites move, so the hash knows where they are
+class SpatialGroup(pg.sprite.Group):
+    def __init__(self, cell_size=CELL_SIZE):
+        self.hash = SpatialHash(cell_size)
+        super().__init__()
+
+
+    def remove_internal(self, sprite):
+        self.hash.remove(sprite)
+        super().remove_internal(sprite)
+
+
+    # moves every sprite to the cells its rect is in
+    # sprite rects are relative to the screen, so offsetx is added to get their world position
+    # this runs for every sprite each step, so the cell range is worked out inline instead of with SpatialHash.move()
+    def update_positions(self, offsetx):
+        cell_size = self.hash.cell_size
+        item_cells = self.hash.item_cells
+        for sprite in self.spritedict:
+            rect = sprite.rect
+            left = rect.x + offsetx
+            cell_range = (int(left // cell_size), rect.y // cell_size, int((left + rect.width - 1) // cell_size), (rect.bottom - 1) // cell_size)
+            if cell_range != item_cells.get(sprite):
+                self.hash.move_to_cells(sprite, cell_range)
+
+
+    # returns the sprites in this group that might collide with rect (relative to the screen)
+    def query(self, rect, offsetx):
+        return self.hash.query(rect.x + offsetx, rect.y, rect.width, rect.height)
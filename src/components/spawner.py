@@ -0,0 +1,34 @@
+# Index of enemy spawn positions sorted by x position.
+# Enemies are only created when the player or the camera gets close to where they spawn,
+# so loading a level doesn't create every enemy up front and far away enemies don't cost anything each tick.
+
+from bisect import bisect_left
+from heapq import merge
+
+
+class SpawnIndex:
+    def __init__(self, positions):
+        self.positions = sorted(positions)  # spawn positions (bottom left) that haven't been spawned yet
+        self.xs = [pos[0] for pos in self.positions]  # x of each position, for bisecting
+
+
+    # adds spawn positions, e.g. from chunks of a streamed map
+    # the new positions are sorted once and merged with the index in a single pass, instead of inserting them one at a time
+    def add(self, positions):
+        self.positions = list(merge(self.positions, sorted(positions)))
+        self.xs = [pos[0] for pos in self.positions]
+
+
+    # removes and returns every position with left <= x < right
+    def take(self, left, right):
+        first = bisect_left(self.xs, left)
+        last = bisect_left(self.xs, right)
+        taken = self.positions[first:last]
+        del self.positions[first:last]
+        del self.xs[first:last]
+        return taken
+
+
+    # number of positions that haven't been spawned yet
+    def __len__(self):
+        return len(self.positions)
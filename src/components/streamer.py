@@ -0,0 +1,60 @@
+# Streams an endless map in chunks of columns.
+# Chunks are generated ahead of the camera and retired once they are far enough behind it,
+# so only a few screens of the map are in memory at once, however far the player runs.
+
+import numpy as np
+from . import map_generator
+
+# map entry for endless mode, shown in the map selector like a saved map
+# every game of endless mode with the same seed has the same map
+ENDLESS_MAP = {"name": "Endless", "endless": True, "seed": 0}
+
+STREAM_AHEAD = 640  # pixels of map kept loaded past the right side of the screen, more than the distance enemies spawn at
+STREAM_BEHIND = 640  # pixels of map kept loaded past the left side of the screen before chunks are retired
+SAFE_CHUNKS = 2  # chunks at the start of the map that are flat and empty, so the player can get started
+ENEMY_DENSITY = 0.06  # chance of an enemy on each free tile, about one enemy per chunk
+
+
+class ChunkStreamer:
+    def __init__(self, seed, rows, chunk_columns, tile_size):
+        self.seed = seed
+        self.rows = rows
+        self.chunk_columns = chunk_columns  # columns per chunk, the same as the map's chunk_size
+        self.tile_size = tile_size
+        self.next_chunk = 0  # index of the next chunk to generate
+
+
+    # returns the tile types (2d array indexed [column, row]) of a chunk
+    # chunks only depend on the seed and their index, so they are the same whatever order they are generated in
+    def generate_chunk(self, index):
+        if index < SAFE_CHUNKS:
+            return map_generator.generate_tilemap((self.seed, index), self.chunk_columns, self.rows, safe_left=self.chunk_columns)
+        # nothing is placed in the last columns of a chunk, so features at the edges of two chunks can't join up (e.g., into a gap too wide to jump)
+        return map_generator.generate_tilemap((self.seed, index), self.chunk_columns, self.rows, enemy_density=ENEMY_DENSITY,
+                                              safe_left=0, safe_right=map_generator.CLEARANCE)
+
+
+    # returns the map data for the start of the map, covering the screen and the distance streamed ahead of it
+    # width is the number of backgrounds (bg_width pixels wide) needed to cover the columns, like any other map
+    def create_map_data(self, name, screen_width, bg_width):
+        chunk_width = self.chunk_columns * self.tile_size
+        chunk_count = -(-(screen_width + STREAM_AHEAD) // chunk_width)
+        chunks = [self.generate_chunk(i) for i in range(chunk_count)]
+        self.next_chunk = chunk_count
+        width = -(-chunk_count * chunk_width // bg_width)
+        return {"name": name, "tilemap": np.concatenate(chunks), "width": width, "streamed": True}
+
+
+    # loads chunks that come into range ahead of the camera and retires chunks that are out of range behind it
+    # returns whether the columns of the map changed
+    def update(self, map, offsetx, screen_width):
+        chunk_width = self.chunk_columns * self.tile_size
+        changed = False
+        while map.pixel_width < offsetx + screen_width + STREAM_AHEAD:
+            map.append_columns(self.generate_chunk(self.next_chunk))
+            self.next_chunk += 1
+            changed = True
+        while map.pixel_left + chunk_width <= offsetx - STREAM_BEHIND:
+            map.drop_columns(self.chunk_columns)
+            changed = True
+        return changed
@@ -0,0 +1,74 @@
+# Shared fonts and a cache of rendered text surfaces.
+# Rendering text is slow compared to blitting, and most text on screen (health numbers, scores, etc.) is the same from frame to frame.
+# Fonts are opened once and shared, and rendered text is kept in a size-bounded LRU cache, so rendering text that was rendered recently is a dictionary lookup.
+
+from collections import OrderedDict
+import pygame as pg
+
+TEXT_CACHE_SIZE = 256  # maximum number of rendered text surfaces kept in memory
+
+fonts = {}  # (name, size, sysfont) -> font
+
+
+# returns the shared font with the given name and size, opening it the first time it is asked for
+# name is a font file (None for the default font), or a system font name if sysfont is true
+def get_font(name, size, sysfont=False):
+    key = (name, size, sysfont)
+    font = fonts.get(key)
+    if font == None:
+        if sysfont:
+            font = pg.font.SysFont(name, size)
+        else:
+            font = pg.font.Font(name, size)
+        fonts[key] = font
+    return font
+
+
+# LRU cache of rendered text surfaces
+# surfaces are shared between everything that renders the same text, so they must not be drawn on
+class TextCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()  # (font, text, antialias, color, background) -> surface, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+
+    # same arguments as font.render(), colours must be hashable (e.g., "black" or (0, 0, 0))
+    def render(self, font, text, antialias, color, background=None):
+        key = (font, text, antialias, color, background)
+        surface = self.surfaces.get(key)
+        if surface != None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+    # fraction of renders that were found in the cache
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        if total == 0:
+            return 0
+        return self.hits / total
+
+
+    # returns the cache statistics as a line of text
+    def format_stats(self):
+        return "{} renders, {} hits, {} misses ({:.1%} hit rate), {} cached surfaces".format(
+            self.hits + self.misses, self.hits, self.misses, self.get_hit_rate(), len(self.surfaces))
+
+
+# cache shared by all text in the program
+text_cache = TextCache(TEXT_CACHE_SIZE)
+
+
+# renders text through the shared cache
+def render(font, text, antialias, color, background=None):
+    return text_cache.render(font, text, antialias, color, background)
@@ -1,6 +1,10 @@
 from turtle import up
 import pygame as pg
+from . import text
 
+# window events after which the window has to be repainted (e.g., it was uncovered or restored from being minimised)
+# states that only push the parts of the screen that changed push the whole screen again after them
+REPAINT_EVENTS = (pg.VIDEOEXPOSE, pg.WINDOWEXPOSED, pg.WINDOWRESTORED)
 
 
 # class for clickable Buttons. Onclick, they run the "command" argument, which is a function
@@ -47,14 +51,14 @@ class Textbox:
 
 
         # title and entry area take up 30 and 70 percent of total textbox height respectively
-        self.title_font = pg.font.Font(None, int(size[1]*0.3))
-        self.content_font = pg.font.Font(None, int(size[1]*0.7)-2*self.margin)
+        self.title_font = text.get_font(None, int(size[1]*0.3))
+        self.content_font = text.get_font(None, int(size[1]*0.7)-2*self.margin)
         self.tb_bg_color = (100, 100, 100)
 
         # Entry box (where text appears when user types)
         self.entry_color = (255, 255, 255)
         if title != None:
-            self.title_text = self.title_font.render(title, True, "black")
+            self.title_text = text.render(self.title_font, title, True, "black")
             self.entry_rect = pg.Rect(0, 0, size[0]-2*self.margin, int(size[1]*0.7)-2*self.margin)  # entry box
         else:
             self.entry_rect = pg.Rect(0, 0, size[0]-2*self.margin, size[1]-2*self.margin)  # entry box
@@ -85,12 +89,12 @@ class Textbox:
     # draw the entrybox and content
     def draw_entry_text(self):
         if self.error == None:
-            text = self.content_font.render(self.content, True, "black")
+            entry_text = text.render(self.content_font, self.content, True, "black")
         else:
-            text = self.content_font.render(self.error, True, "red")
-        text_rect = text.get_rect()
+            entry_text = text.render(self.content_font, self.error, True, "red")
+        text_rect = entry_text.get_rect()
         text_rect.center = self.entry_rect.center
-        self.parent.blit(text, text_rect)
+        self.parent.blit(entry_text, text_rect)
 
 
     # update position of tb components
@@ -127,15 +131,15 @@ class Incrementer:
         self.callback = callback
         
         # font and positioning
-        self.title_font = pg.font.SysFont("Arial", 15)
-        self.value_font = pg.font.SysFont("Arial", 12)
+        self.title_font = text.get_font("Arial", 15, sysfont=True)
+        self.value_font = text.get_font("Arial", 12, sysfont=True)
         self.margin = 5  # pixel margin separating the components of this widget
         self.value = init_value  # value of this widget
 
         # creating buttons
-        self.title_text = self.title_font.render(str(title), True, "black")
+        self.title_text = text.render(self.title_font, str(title), True, "black")
         self.increase_width_button = Button(self.parent, self.resources["arrow_up.png"], (0, 0), lambda: self.callback(1))
-        self.value_text = self.value_font.render(str(self.value), True, "black")
+        self.value_text = text.render(self.value_font, str(self.value), True, "black")
         self.decrease_width_button = Button(self.parent, self.resources["arrow_down.png"], (0, 0), lambda: self.callback(-1))
         buttons.append(self.increase_width_button)
         buttons.append(self.decrease_width_button)
@@ -163,7 +167,7 @@ class Incrementer:
     # sets the value for the incrementer
     def set_value(self, new_value):
         self.value = new_value
-        self.value_text = self.value_font.render(str(self.value), True, "black")
+        self.value_text = text.render(self.value_font, str(self.value), True, "black")
         self.position_components()
 
     
@@ -1,6 +1,8 @@
-import json
+import base64, json, zlib
+import numpy as np
 
 DATA_PATH = "data.json"
+TILEMAP_FORMAT = 2  # version of the encoded tilemap format written to data.json
 
 
 # Holds and Manipulates Data
@@ -15,7 +17,7 @@ class DataHandler:
         try:
             with open(DATA_PATH) as json_file:
                 data = json.load(json_file)
-                self.data = data
+                self.data = decode_data(data)
                 return 0
         except FileNotFoundError:
             return 1
@@ -26,16 +28,15 @@ class DataHandler:
         if data == None:
             data = self.data
         with open(DATA_PATH, "w") as json_file:
-            json.dump(data, json_file)
+            json.dump(encode_data(data), json_file)
 
 
     # creates a new data.json file from default_data.json
     def create_default_data(self):
         with open("default_data.json") as default_data:
-            data = json.load(default_data)
+            data = decode_data(json.load(default_data))
 
-        with open(DATA_PATH, "w") as json_file:
-            json.dump(data, json_file)
+        self.write_data(data)
         
         self.data = data
 
@@ -53,18 +54,10 @@ class DataHandler:
             if data_map["name"] == name:
                 return "Duplicate Name."
 
-        # transform map into list with tile types
-        new_tilemap = []
-        for col in map.tilemap:
-            new_col = []
-            for tile in col:
-                new_col.append(tile.type)
-            new_tilemap.append(new_col)
-        
         # create dictionary to prepare to append
         map = {
             "name": name,
-            "tilemap": new_tilemap,
+            "tilemap": map.tilemap.copy(),
             "width": map.width
         }
 
@@ -73,3 +66,42 @@ class DataHandler:
         self.write_data()
 
         return 0
+
+
+
+# returns a copy of data with every tilemap encoded for writing to data.json
+def encode_data(data):
+    data = data.copy()
+    data["maps"] = [dict(map, tilemap=encode_tilemap(map["tilemap"])) for map in data["maps"]]
+    return data
+
+
+# returns data with every tilemap read from data.json decoded into an array
+def decode_data(data):
+    for map in data["maps"]:
+        map["tilemap"] = decode_tilemap(map["tilemap"])
+    return data
+
+
+# encodes a tilemap array into a small dictionary that can be stored in json
+# the tile types are stored column by column, compressed with zlib and packed into a base64 string
+# maps are mostly empty tiles, so the compressed data is tiny compared to a nested list of ints
+def encode_tilemap(tilemap):
+    tilemap = np.ascontiguousarray(tilemap, dtype=np.uint8)
+    return {
+        "format": TILEMAP_FORMAT,
+        "cols": tilemap.shape[0],
+        "rows": tilemap.shape[1],
+        "data": base64.b64encode(zlib.compress(tilemap.tobytes(), 9)).decode("ascii")
+    }
+
+
+# decodes a tilemap from data.json into a 2d uint8 array indexed [column, row]
+# tilemaps saved before the encoded format was added are nested lists of ints, which are still supported
+def decode_tilemap(tilemap):
+    if isinstance(tilemap, dict):
+        if tilemap.get("format") != TILEMAP_FORMAT:
+            raise ValueError("Unsupported tilemap format: " + str(tilemap.get("format")))
+        raw = zlib.decompress(base64.b64decode(tilemap["data"]))
+        return np.frombuffer(raw, dtype=np.uint8).reshape(tilemap["cols"], tilemap["rows"]).copy()
+    return np.array(tilemap, dtype=np.uint8)
@@ -5,6 +5,7 @@ import pygame
 pygame.init()
 
 from . import resource_handler, data_handler
+from .components import enemy_pool
 from .states import game, main_menu, difficulty_change, map_creator, map_selector
 
 
@@ -14,7 +15,14 @@ def start():
   # Constants
   constants = {
     "SCREEN_SIZE": (600, 400),
-    "TILE_SIZE": 32
+    "TILE_SIZE": 32,
+    "FPS": 30,  # frames drawn per second
+    "SIM_RATE": 30,  # game simulation steps per second, independent of FPS (entity speeds are tuned for 30)
+    "ENEMY_BACKEND": "sprites",  # sprites = each enemy updates itself, batch = all enemies are updated at once with NumPy
+    "FLOW_FIELD_WORKER": False,  # work out the flow field enemies follow on a worker thread instead of during the game step
+    "DIRTY_RECTS": False,  # only push the regions of the screen each state reports as changed
+    "LOAD_WORKERS": None,  # threads used to decode resources, None = decided by number of cores
+    "RESOURCE_CACHE": ".cache/resources"  # directory decoded resources are cached in, None = no cache
   }
 
   Control(constants)
@@ -26,8 +34,12 @@ class Control:
     pygame.display.set_caption("Dweller")
     self.constants = constants
     
+    # Initialize display first, so resources can be converted to the display's pixel format when they load
+    self.root = pygame.display.set_mode(self.constants["SCREEN_SIZE"])
+
     # Load resources and data
-    self.resources = resource_handler.load_resources()
+    self.resources = resource_handler.load_resources(self.constants["LOAD_WORKERS"], self.constants["RESOURCE_CACHE"])
+    self.enemy_pool = enemy_pool.EnemyPool(self.root, self.resources)  # enemies are reused across games
     self.datah = data_handler.DataHandler()  # data handler (loading, writing, etc.)
     if self.datah.load_data() == 1:  # load_data() returns 1 upon FileNotFoundError
       self.datah.create_default_data()
@@ -41,7 +53,6 @@ class Control:
 
 
     # Initialize PyGame Variables
-    self.root = pygame.display.set_mode(self.constants["SCREEN_SIZE"])
     self.clock = pygame.time.Clock()
 
     # initally start on main menu
@@ -59,12 +70,16 @@ class Control:
       self.state_object.update()
     
       # update display and tick
-      pygame.display.update()
-      self.clock.tick(30)
+      if self.constants["DIRTY_RECTS"]:
+        pygame.display.update(self.state_object.get_dirty_rects())
+      else:
+        pygame.display.update()
+      self.clock.tick(self.constants["FPS"])
 
       
   # loads main menu screen
   def load_main_menu(self, difficulty=None, score=None):
+    self.leave_game()
     self.state = "main_menu"
     self.state_object = main_menu.Main_Menu(self.root, self.resources, self.load_map_selector, self.load_difficulty_change, self.load_map_creator)
     
@@ -84,8 +99,15 @@ class Control:
       if score > self.high_score:
         self.high_score = score
         
+    self.leave_game()
     self.state = "game"
-    self.state_object = game.Game(self.root, self.resources, self.load_game, self.load_main_menu, self.high_score, self.difficulty, self.constants["TILE_SIZE"], map)
+    self.state_object = game.Game(self.root, self.resources, self.load_game, self.load_main_menu, self.high_score, self.difficulty, self.constants["TILE_SIZE"], map, self.constants["SIM_RATE"], self.constants["ENEMY_BACKEND"], self.constants["FLOW_FIELD_WORKER"], self.enemy_pool)
+
+
+  # returns the enemies of the game being left to the pool
+  def leave_game(self):
+    if self.state == "game":
+      self.state_object.release_enemies()
 
 
   # loads difficulty selection screen
@@ -1,7 +1,10 @@
-# This program simply loads all images/sound as pygame objects and returns them as a dictionary for use in the program.
+# This program loads all images/sound as pygame objects and returns them as a dictionary for use in the program.
+# Assets are loaded lazily: the dictionary only indexes the files at startup and loads each asset the first time it is used.
 
 
-import os, pygame
+import hashlib, json, os, time, pygame
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 PATH_TO_RESOURCES = "resources"
 
@@ -25,50 +28,366 @@ exceptions = {
   "resources/images/woodcutter/Fall": "woodcutter_fall"
 }
 
+# images in these directories are packed into a single atlas even though they are not animations
+# they are still loaded directly into the resources dictionary under their file names
+atlas_dirs = [
+  "resources/images/terrain/Tiles"
+]
+
+ATLAS_WIDTH = 1024  # maximum width of an atlas surface in pixels
+FLIP_CACHE_SIZE = 128  # maximum number of horizontally flipped animation frames kept in memory
+CACHE_VERSION = 1  # version of the files written by DecodeCache, bump to invalidate every cached file
+
 # normalize all paths for cross-compatibility
 # different OS have different path conventions (e.g., using / or \ for path delimiters)
 new_exceptions = {}
 for key in exceptions.keys():
   new_exceptions[os.path.normpath(key)] = exceptions[key]
 exceptions = new_exceptions
+atlas_dirs = [os.path.normpath(path) for path in atlas_dirs]
+
+
+# converts an image to the pixel format of the display so blitting it doesn't need a conversion every time
+# the display mode must be set before this is called
+def normalize_image(image):
+  if image.get_flags() & pygame.SRCALPHA:
+    return image.convert_alpha()
+  return image.convert()
+
+
+# packs a list of images into one atlas surface in the display's pixel format
+# returns a list of subsurfaces of the atlas, one for each image in the same order
+def pack_atlas(images):
+  # place images left to right in rows (shelves), starting a new row when the current one is full
+  positions = []
+  x = 0
+  y = 0
+  row_height = 0
+  atlas_width = 0
+  for image in images:
+    width, height = image.get_size()
+    if x + width > ATLAS_WIDTH and x > 0:
+      x = 0
+      y += row_height
+      row_height = 0
+    positions.append((x, y))
+    x += width
+    row_height = max(row_height, height)
+    atlas_width = max(atlas_width, x)
+
+  atlas = pygame.Surface((max(atlas_width, 1), max(y + row_height, 1)), pygame.SRCALPHA).convert_alpha()
+  atlas.fill((0, 0, 0, 0))
+  for image, pos in zip(images, positions):
+    atlas.blit(image, pos)
+
+  return [atlas.subsurface(pygame.Rect(pos, image.get_size())) for image, pos in zip(images, positions)]
+
+
+# dictionary of resources that loads each asset the first time it is accessed
+# keys are the same as if everything were loaded up front (e.g., resources["bg.png"], resources["golem_walk"])
+# only assets that have been loaded are actually stored in the dictionary
+class Resources(dict):
+  def __init__(self, workers=None, cache=None):
+    super().__init__()
+    # key -> group the key is loaded with
+    # a group is (kind, path), where kind = animation | atlas | image | sound
+    # loading a group loads every key in the group at once (e.g., an animation and its reverse)
+    self.index = {}
+    self.loaded_groups = set()
+
+    # number of threads used to decode files in warm_up()
+    # None lets ThreadPoolExecutor choose based on the number of cores
+    self.workers = workers
+    self.load_report = None  # timings of the last warm_up() call
+    self.cache = cache  # DecodeCache used when decoding files, or None to always decode from scratch
+
+    # collision mask of each animation frame
+    # keyed by the frame's surface, built once when the animation is loaded
+    # hurtboxes are fixed body rects (see Entity.get_body()), so the tight bounds of frames are not kept
+    self.masks = {}
+
+    # flipped version of each animation frame that has been drawn facing left, least recently used first
+    # frames are only flipped when they are first needed, and the least recently used ones are dropped past FLIP_CACHE_SIZE
+    self.flipped = OrderedDict()
+
+
+  # called by dict when a key is not loaded yet
+  def __missing__(self, key):
+    if key not in self.index:
+      raise KeyError(key)
+    group = self.index[key]
+    self.assemble_group(group, {path: decode_file(path, self.cache) for path in get_group_files(group)})
+    return dict.__getitem__(self, key)
+
+
+  # true for every key that can be loaded, not just keys that have already been loaded
+  def __contains__(self, key):
+    return key in self.index
+
+
+  # loads the given keys (or every key, if keys is None) ahead of time
+  # states can call this so assets they will need are not loaded in the middle of gameplay
+  # files are decoded on a thread pool (pygame decodes in C without holding the GIL)
+  # then each group is assembled on the main thread, since converting surfaces needs the display
+  # returns a report of how long each phase took, which is also kept in self.load_report
+  def warm_up(self, keys=None, workers=None):
+    if keys == None:
+      keys = self.index.keys()
+    if workers == None:
+      workers = self.workers
+    if workers == None:
+      workers = min(32, (os.cpu_count() or 1) + 4)  # same default as ThreadPoolExecutor
+    groups = sorted(set(self.index[key] for key in keys) - self.loaded_groups)
+    paths = [path for group in groups for path in get_group_files(group)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+      decoded = dict(zip(paths, executor.map(lambda path: decode_file(path, self.cache), paths)))
+    decoded_time = time.perf_counter()
+    for group in groups:
+      self.assemble_group(group, decoded)
+    end = time.perf_counter()
+
+    self.load_report = {
+      "files": len(paths),
+      "workers": workers,
+      "decode_ms": (decoded_time - start) * 1000,
+      "assemble_ms": (end - decoded_time) * 1000,
+      "total_ms": (end - start) * 1000
+    }
+    return self.load_report
+
+
+  # puts the decoded files of a group into the dictionary
+  # decoded is a dictionary of path -> decoded image/sound
+  def assemble_group(self, group, decoded):
+    kind, path = group
+    files = get_group_files(group)
+    # each animation is packed into its own atlas
+    # its horizontally flipped version is a FlippedFrames list, which flips frames when they are used
+    if kind == "animation":
+      self[exceptions[path]] = pack_atlas([decoded[file] for file in files])
+      self[exceptions[path]+"_reverse"] = FlippedFrames(self, self[exceptions[path]])
+      for frame in self[exceptions[path]]:
+        self.get_mask(frame)
+    # images in atlas directories are packed together, but loaded directly into dict
+    elif kind == "atlas":
+      images = pack_atlas([decoded[file] for file in files])
+      for file, image in zip(files, images):
+        self[os.path.basename(file)] = image
+    elif kind == "image":
+      self[os.path.basename(path)] = normalize_image(decoded[path])
+    elif kind == "sound":
+      self[os.path.basename(path)] = decoded[path]
+    self.loaded_groups.add(group)
+
+
+  # returns the horizontally flipped version of an animation frame, flipping it the first time it is asked for
+  def get_flipped(self, image):
+    flipped = self.flipped.get(image)
+    if flipped != None:
+      self.flipped.move_to_end(image)
+      return flipped
+
+    flipped = pygame.transform.flip(image, True, False)
+    self.flipped[image] = flipped
+    if len(self.flipped) > FLIP_CACHE_SIZE:
+      # entities still showing a dropped frame keep their own reference to it
+      old_image, old_flipped = self.flipped.popitem(last=False)
+      self.masks.pop(old_flipped, None)
+    return flipped
+
+
+  # returns the collision mask of an image, building it the first time it is asked for
+  def get_mask(self, image):
+    mask = self.masks.get(image)
+    if mask == None:
+      mask = pygame.mask.from_surface(image)
+      self.masks[image] = mask
+    return mask
+
+
+# returns the paths of all files in a group, sorted so animation frames are in order
+def get_group_files(group):
+  kind, path = group
+  if kind == "animation" or kind == "atlas":
+    return [os.path.join(path, file) for file in sorted(os.listdir(path))]
+  return [path]
+
+
+# decodes a single image or sound file
+# if a DecodeCache is given, the decoded file is read from or written to the cache
+# safe to call from worker threads, because it doesn't touch the display
+def decode_file(path, cache=None):
+  if cache != None:
+    decoded = cache.load(path)
+    if decoded != None:
+      return decoded
+
+  if "sounds" in path.split(os.sep):
+    decoded = pygame.mixer.Sound(path)
+  else:
+    decoded = pygame.image.load(path)
+
+  if cache != None:
+    cache.store(path, decoded)
+  return decoded
+
+
+# list of the horizontally flipped frames of an animation (e.g., resources["golem_walk_reverse"])
+# it is indexed like a normal list of frames, but frames are only flipped when they are indexed
+class FlippedFrames:
+  def __init__(self, resources, frames):
+    self.resources = resources
+    self.frames = frames  # frames of the animation facing right
+
+
+  def __getitem__(self, index):
+    return self.resources.get_flipped(self.frames[index])
+
+
+  def __len__(self):
+    return len(self.frames)
+
+
+# on-disk cache of decoded images (raw pixels) and sounds (raw PCM samples)
+# rebuilding a surface or sound from raw data is much faster than decoding a png or mp3
+# each source file has one cache file, which is replaced when the source file's size or modified time changes
+# masks and flipped images are not cached, they are rebuilt from the cached pixels in a single pass
+class DecodeCache:
+  def __init__(self, path):
+    self.path = path
+    os.makedirs(path, exist_ok=True)
+
+
+  # path of the cache file for a source file
+  def get_cache_path(self, path):
+    name = hashlib.sha1(os.path.normpath(path).encode()).hexdigest()
+    return os.path.join(self.path, name + ".bin")
+
+
+  # header identifying the version of a source file
+  # a cache file is only used if its header matches the header of the source file
+  def get_header(self, path, kind):
+    stat = os.stat(path)
+    header = {"version": CACHE_VERSION, "path": os.path.normpath(path), "size": stat.st_size, "mtime": stat.st_mtime_ns, "kind": kind}
+    if kind == "sound":
+      # raw samples are only valid for the mixer settings they were decoded with
+      header["mixer"] = list(pygame.mixer.get_init())
+    return header
+
+
+  # returns the decoded image/sound for path, or None if it isn't cached (or the cache file is out of date)
+  def load(self, path):
+    try:
+      with open(self.get_cache_path(path), "rb") as cache_file:
+        header = json.loads(cache_file.readline())
+        data = cache_file.read()
+    except (OSError, ValueError):
+      return None
+
+    expected_header = self.get_header(path, header.get("kind"))
+    for key in expected_header:
+      if header.get(key) != expected_header[key]:
+        return None
+    if header["kind"] == "sound":
+      return pygame.mixer.Sound(buffer=data)
+    image = pygame.image.frombuffer(data, (header["width"], header["height"]), header["format"])
+    if "palette" in header:
+      image.set_palette(header["palette"])
+    if "colorkey" in header:
+      image.set_colorkey(header["colorkey"])
+    return image
+
+
+  # writes a decoded image/sound to the cache
+  def store(self, path, decoded):
+    if isinstance(decoded, pygame.mixer.Sound):
+      header = self.get_header(path, "sound")
+      data = decoded.get_raw()
+    else:
+      header = self.get_header(path, "image")
+      header["width"], header["height"] = decoded.get_size()
+      if decoded.get_bitsize() == 8:
+        # paletted images are stored as palette indexes, the palette holds their transparency
+        header["format"] = "P"
+        header["palette"] = [list(colour) for colour in decoded.get_palette()]
+        data = pygame.image.tobytes(decoded, "P")
+        if decoded.get_colorkey() != None:
+          header["colorkey"] = get_colorkey_index(decoded, data)
+      else:
+        header["format"] = "RGBA" if decoded.get_flags() & pygame.SRCALPHA else "RGB"
+        data = pygame.image.tobytes(decoded, header["format"])
+        if decoded.get_colorkey() != None:
+          header["colorkey"] = list(decoded.get_colorkey())
+
+    # write to a temporary file first, so a half written cache file is never read
+    cache_path = self.get_cache_path(path)
+    temp_path = cache_path + "." + str(os.getpid()) + ".tmp"
+    with open(temp_path, "wb") as cache_file:
+      cache_file.write(json.dumps(header).encode() + b"\n")
+      cache_file.write(data)
+    os.replace(temp_path, cache_path)
+
+
+# returns the palette index that is the colorkey of a paletted image
+# get_colorkey() only gives the colour, and a palette can have the same colour at several indexes
+# data is the image as palette indexes
+def get_colorkey_index(image, data):
+  # pixels with the colorkey are the only ones that stay transparent when the image is blitted
+  test = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+  test.fill((0, 0, 0, 0))
+  test.blit(image, (0, 0))
+  i = pygame.image.tobytes(test, "RGBA")[3::4].find(0)
+  if i != -1:
+    return data[i]
+  # no pixel uses the colorkey, so any index with the colorkey's colour that no pixel uses matches
+  colorkey = image.get_colorkey()
+  for index, colour in enumerate(image.get_palette()):
+    if colour == colorkey and index not in data:
+      return index
+  return image.map_rgb(colorkey)
+
+
+# formats a load report from Resources.warm_up() as a line of text
+def format_load_report(report):
+  return "{files} files on {workers} workers: decode {decode_ms:.1f}ms, assemble {assemble_ms:.1f}ms, total {total_ms:.1f}ms".format(**report)
 
 
-# loads resources and returns resources dictionary
-def load_resources():
-  resources = {}
+# indexes resources and returns resources dictionary
+# nothing is decoded here, see Resources
+# workers is the number of threads used to decode files when resources are warmed up
+# cache_path is the directory decoded files are cached in, or None to disable the cache
+def load_resources(workers=None, cache_path=None):
+  cache = None
+  if cache_path != None:
+    cache = DecodeCache(cache_path)
+  resources = Resources(workers, cache)
 
   # use os.walk to search through all directories in assets/ directory
   for root, dirs, files in os.walk(PATH_TO_RESOURCES):
     # split path into parts
     bits = root.split(os.sep)
-    # if the directory is images, then load the images
+    # if the directory is images, then index the images
     if "images" in bits:
       # account for exceptions
       if root in exceptions.keys():
-        sprite_dict = {}
-        sprite_dict_reverse = {} # horizontally flipped version of sprites
+        group = ("animation", root)
+        resources.index[exceptions[root]] = group
+        resources.index[exceptions[root]+"_reverse"] = group
+      elif root in atlas_dirs:
+        group = ("atlas", root)
         for file in files:
-          image = pygame.image.load(os.path.join(root, file))
-          image_reverse = pygame.transform.flip(image, True, False)
-          sprite_dict[file] = image
-          sprite_dict_reverse[file] = image_reverse
-        sorted_sprite_list = list(sprite_dict.keys())
-        sorted_sprite_list.sort()
-        sorted_sprite_reverse_list = list(sprite_dict_reverse.keys())
-        sorted_sprite_reverse_list.sort()
-        resources[exceptions[root]] = [sprite_dict[key] for key in sorted_sprite_list]
-        resources[exceptions[root]+"_reverse"] = [sprite_dict_reverse[key] for key in sorted_sprite_reverse_list]
-      # if not exception, load directly into dict
+          resources.index[file] = group
+      # if not exception, index directly
       else:
         for file in files:
-          image = pygame.image.load(os.path.join(root, file))
-          resources[file] = image
+          resources.index[file] = ("image", os.path.join(root, file))
     # same as images, except for sounds
     if "sounds" in bits:
       for file in files:
-        sound = pygame.mixer.Sound(os.path.join(root, file))
-        resources[file] = sound
-    # same as images, except for music
+        resources.index[file] = ("sound", os.path.join(root, file))
+    # music is streamed by pygame, so it is not decoded here either
     if "music" in bits:
       for file in files:
         pygame.mixer.music.load(os.path.join(root, file))
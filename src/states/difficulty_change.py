@@ -48,6 +48,11 @@ class Difficulty_Change:
     self.hard_pos = (hard_x, hard_y)
     self.hard_hitbox = self.hard_image.get_rect(topleft=self.hard_pos)
 
+    # regions of the screen that changed in the last update (for dirty rect display updates)
+    # nothing on this screen moves, so only the first frame needs to be pushed to the display
+    self.dirty_rects = [self.parent.get_rect()]
+    self.drawn = False
+
 
   # called once per tick by main.py
   def update(self):
@@ -61,6 +66,10 @@ class Difficulty_Change:
       if event.type == pygame.QUIT:
         pygame.quit()
 
+      # the window needs repainting, so the next frame is pushed to the display again
+      if event.type in ui.REPAINT_EVENTS:
+        self.drawn = False
+
       if event.type == pygame.MOUSEBUTTONDOWN:
         if event.button == 1:
           # check clicks for each button
@@ -81,4 +90,14 @@ class Difficulty_Change:
     self.parent.blit(self.easy_image, self.easy_pos)
     self.parent.blit(self.okay_image, self.okay_pos)
     self.parent.blit(self.hard_image, self.hard_pos)
-    
\ No newline at end of file
+
+    if self.drawn:
+      self.dirty_rects = []
+    else:
+      self.dirty_rects = [self.parent.get_rect()]
+      self.drawn = True
+
+
+  # returns the regions of the screen that changed in the last update
+  def get_dirty_rects(self):
+    return self.dirty_rects
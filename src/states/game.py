@@ -1,12 +1,31 @@
 import pygame_widgets
 from pygame_widgets.slider import Slider
+import numpy as np
 import pygame as pg
-from ..components import entities, ui, map
+from ..components import entities, enemy_batch, map_generator, spatial_hash, spawner, streamer, ui, map, text
+
+
+# assets that are loaded before the game starts (see Resources.warm_up() in resource_handler.py)
+GAME_RESOURCES = [
+    "bg.png", "portal1.png", "portal2.png", "portal3.png", "portal4.png",
+    "Tile_01.png",  # tiles are packed in one atlas, so this loads every tile
+    "woodcutter_idle", "woodcutter_run", "woodcutter_attack", "woodcutter_hurt", "woodcutter_death", "woodcutter_jump", "woodcutter_fall",
+    "golem_idle", "golem_walk", "golem_attack", "golem_hurt", "golem_death",
+    "axe1.mp3", "player_hurt.mp3", "game_over.mp3", "swing.mp3", "enemy_hurt.mp3"
+]
+
+# maximum number of simulation steps run in one frame
+# if frames take longer than this, the game slows down instead of trying to catch up forever
+MAX_STEPS_PER_FRAME = 5
+
+# whether attacks also need the pixels of the attacker and target to overlap, after their hitbox and hurtbox overlap
+# hitboxes and hurtboxes are precise enough on their own, so this is off by default because mask checks are slower
+COMBAT_MASK_CHECK = False
 
 
 # Controls the game screen
 class Game:
-    def __init__(self, parent, resources, start_new_game, load_main_menu, high_score, difficulty, tile_size, map_data):
+    def __init__(self, parent, resources, start_new_game, load_main_menu, high_score, difficulty, tile_size, map_data, sim_rate, enemy_backend, flow_field_worker, enemy_pool):
         self.parent = parent
         self.resources = resources
         self.start_new_game = start_new_game
@@ -14,41 +33,78 @@ class Game:
         self.high_score = high_score
         self.difficulty = difficulty
         self.map_data = map_data
+        self.enemy_pool = enemy_pool  # enemies are taken from and returned to this pool, see enemy_pool.EnemyPool
 
         # important variables
-        self.cur_time = pg.time.get_ticks()
         self.screen_size = (parent.get_width(), parent.get_height())
         self.scroll_speed = 5  # speed the background scrolls
         self.enemies_defeated = 0  # how many enemies have been defeated
+        self.enemies_fallen = 0  # how many enemies fell out of the bottom of the map, see release_fallen_enemies()
         self.game_over = False  # whether the game is over
         self.buttons = []  # list of all button objects for ui
         self.paused = False  # whether game is paused
-        self.tick_count = 0 # used to track how long since the game has started
+        self.tick_count = 0 # number of simulation steps, used to track how long since the game has started
         self.music_on = True  # whether music is on
 
+        # load the assets used during gameplay now, so they are not loaded the first time something appears
+        self.resources.warm_up(GAME_RESOURCES)
+
         # create map object
-        self.map = map.Map(self.parent, self.resources, tile_size, self.map_data)
+        # endless maps are generated in chunks while the game is played, see stream_map()
+        # generated maps are generated from their seed when the game starts
+        self.streamer = None
+        if self.map_data.get("endless"):
+            rows = int(self.resources["bg.png"].get_height()/tile_size) + 1
+            self.streamer = streamer.ChunkStreamer(self.map_data["seed"], rows, map.CHUNK_SIZE, tile_size)
+            self.map = map.Map(self.parent, self.resources, tile_size, self.streamer.create_map_data(self.map_data["name"], self.screen_size[0], self.resources["bg.png"].get_width()), flow_field_worker)
+            enemy_backend = "sprites"  # the batch's collision tables can't be streamed
+        elif self.map_data.get("generated"):
+            generated_map = map_generator.generate_map(self.resources["bg.png"].get_size(), tile_size, self.map_data["seed"], self.map_data["width"], self.map_data["name"])
+            self.map = map.Map(self.parent, self.resources, tile_size, generated_map, flow_field_worker)
+        else:
+            self.map = map.Map(self.parent, self.resources, tile_size, self.map_data, flow_field_worker)
 
         # create sprite groups
         self.all_sprites = pg.sprite.Group()
-        self.enemies = pg.sprite.Group()
+        self.enemies = spatial_hash.SpatialGroup()  # enemies are kept in a spatial hash for collision checks
         self.obstacles = pg.sprite.Group()
+        self.healthbar_overlay = entities.HealthbarOverlay(self.parent)
+
+        # enemy_backend = sprites | batch
+        # sprites: every enemy is an Enemy sprite that updates itself
+        # batch: enemies are simulated together in an EnemyBatch, and only enemies on screen have sprites
+        self.enemy_batch = None
+        if enemy_backend == "batch":
+            self.enemy_batch = enemy_batch.EnemyBatch(self.parent, self.resources, self.map, self.difficulty, self.handle_enemy_death, (self.all_sprites, self.enemies))
 
         # create initial objects and add to sprite groups
-        self.player = entities.Player(self.parent, self.resources, self.end_game, self.map.get_nearby_tiles)
+        self.player = entities.Player(self.parent, self.resources, self.end_game, self.map.get_nearby_tiles, self.map.sweep)
         self.all_sprites.add(self.player)
+        self.spawn_index = spawner.SpawnIndex([])  # positions of enemies that haven't been generated yet
         self.generate_map_enemies()  # generate an enemy for every enemy tile in map
 
+        # fixed timestep simulation
+        # the game is simulated in steps of step_time, no matter how often frames are drawn
+        # entity speeds and gravity are per step, so sim_rate sets the speed of the game
+        self.sim_rate = sim_rate  # simulation steps per second
+        self.step_time = 1000 / sim_rate  # milliseconds per step
+        self.cur_time = pg.time.get_ticks()  # simulated time (ms), only advances while the game is being played
+        self.last_frame_time = self.cur_time  # real time of the last update
+        self.accumulator = 0  # real time (ms) that hasn't been simulated yet
+
         # for horizontal camera movement (tracks player movement)
         self.offsetx = self.player.get_centerx() - self.screen_size[0] / 2
+        self.spawn_enemies()
+        if self.enemy_batch != None:
+            self.enemy_batch.sync_sprites(self.offsetx)
 
         # start music
         pg.mixer.music.rewind()
         pg.mixer.music.play(-1)
 
         # fonts for text
-        self.font1 = pg.font.SysFont("dejavuserif", 50)
-        self.font2 = pg.font.SysFont("Arial", 25)
+        self.font1 = text.get_font("dejavuserif", 50, sysfont=True)
+        self.font2 = text.get_font("Arial", 25, sysfont=True)
 
         # GAME OVER UI
         centerx = self.screen_size[0]/2
@@ -95,25 +151,60 @@ class Game:
         # Slider for pause screen
         slider_height = 15
         self.slider = Slider(self.parent, int(x), int(centery-slider_height/2), 80, slider_height, min=0, max=99, step=1, initial=99)
+        handle_size = 2*self.slider.handleRadius
+        self.slider_rect = pg.Rect(self.slider.getX(), self.slider.getY(), self.slider.getWidth(), self.slider.getHeight()).inflate(handle_size, handle_size)
+
+        # regions of the screen that changed in the last update (for dirty rect display updates)
+        self.dirty_rects = [self.parent.get_rect()]
+        self.draw_mode = None  # playing | paused | game_over, what was shown when the screen was last drawn
 
 
 
-    # called once per tick by main.py
+    # called once per frame by main.py
+    # runs as many simulation steps as fit in the time since the last frame, then draws
     def update(self):
-        # the update function is called once per tick
-        self.cur_time = pg.time.get_ticks()
+        frame_time = pg.time.get_ticks()
+        elapsed = frame_time - self.last_frame_time
+        self.last_frame_time = frame_time
         events = self.handle_events()
 
         # update player and enemy movements if the game is not paused and is still going
         if not self.game_over and not self.paused:
-            self.player.update(self.cur_time, self.offsetx)
-            self.check_bounds()
-            self.enemies.update(self.cur_time, self.offsetx, self.player.get_centerx())
-            self.check_collision()
-            self.tick_count += 1
+            self.accumulator += min(elapsed, MAX_STEPS_PER_FRAME * self.step_time)
+            while self.accumulator >= self.step_time and not self.game_over:
+                self.step()
+                self.accumulator -= self.step_time
 
         # blits everything on parent surface
-        self.draw(events)
+        # entities are drawn part of the way to their next position, depending on how much time is left over
+        self.draw(events, self.accumulator / self.step_time)
+
+
+    # advances the game by one simulation step
+    def step(self):
+        self.cur_time += self.step_time
+        for sprite in self.all_sprites.sprites():
+            sprite.save_prev_pos()
+
+        self.player.update(self.cur_time, self.offsetx)
+        self.check_bounds()
+        if self.streamer != None:
+            self.stream_map()
+        self.map.update_flow_field((self.player.get_centerx(), self.player.pos[1]))
+        self.spawn_enemies()
+        if self.enemy_batch != None:
+            self.enemy_batch.update(self.cur_time, self.player.get_centerx())
+            self.enemy_batch.sync_sprites(self.offsetx)
+        else:
+            self.enemies.update(self.cur_time, self.offsetx, self.player.get_centerx())
+        self.release_fallen_enemies()
+
+        # collisions use the simulated positions, not the positions drawn on screen
+        for sprite in self.all_sprites.sprites():
+            sprite.update_rect(self.offsetx)
+        self.enemies.update_positions(self.offsetx)
+        self.check_collision()
+        self.tick_count += 1
 
 
     # handles events
@@ -123,6 +214,10 @@ class Game:
             if event.type == pg.QUIT:
                 pg.quit()
 
+            # the window needs repainting, so the next frame is pushed to the display again (e.g., while paused)
+            if event.type in ui.REPAINT_EVENTS:
+                self.draw_mode = None
+
             if not self.game_over:
                 if event.type == pg.MOUSEBUTTONDOWN:
                     if event.button == 1:
@@ -169,16 +264,17 @@ class Game:
 
 
     # draws everything in the game
-    def draw(self, events):
-        self.scroll()  # update screen offset
+    # alpha is how far between the last simulation step and the next the frame is drawn
+    def draw(self, events, alpha=1):
+        self.scroll(alpha)  # update screen offset
 
         self.map.draw(self.offsetx)  # draw map (background + tiles)
         self.settings_icon.draw() 
 
         # update Rect position of all sprites to prepare to draw
         for sprite in self.all_sprites.sprites():
-            sprite.update_rect(self.offsetx)
-            sprite.healthbar.render()  # render healthbar of all sprites
+            sprite.update_rect(self.offsetx, alpha)
+        self.healthbar_overlay.draw(self.all_sprites.sprites())  # draw healthbars of all sprites at once
         # draw all sprites
         self.all_sprites.draw(self.parent)  # use pygame built-in draw function for sprite groups
 
@@ -207,13 +303,39 @@ class Game:
             pg.mixer.music.set_volume(self.slider.getValue()/100)
             pygame_widgets.update(events)
 
+        self.update_dirty_rects()
+
+
+    # works out which regions of the screen changed in the last draw
+    # while paused only the volume slider can change, and nothing changes once the game is over
+    def update_dirty_rects(self):
+        if self.game_over:
+            draw_mode = "game_over"
+        elif self.paused:
+            draw_mode = "paused"
+        else:
+            draw_mode = "playing"
+
+        if draw_mode == "playing" or draw_mode != self.draw_mode:
+            self.dirty_rects = [self.parent.get_rect()]
+        elif draw_mode == "paused":
+            self.dirty_rects = [self.slider_rect]
+        else:
+            self.dirty_rects = []
+        self.draw_mode = draw_mode
+
+
+    # returns the regions of the screen that changed in the last update
+    def get_dirty_rects(self):
+        return self.dirty_rects
+
     # ends the game upon being called
     def end_game(self, win=False):
         self.win = win
         pg.mixer.music.stop()
 
         # calculate score
-        time = int(self.tick_count/30)
+        time = int(self.tick_count/self.sim_rate)
         score = self.enemies_defeated
 
         # update high score if score is higher than high score
@@ -222,13 +344,13 @@ class Game:
 
         # positioning images for post-game ui
         centerx = self.screen_size[0]/2  # for positioning
-        self.enemies_defeated_text = self.font2.render("Enemies Defeated: " + str(self.enemies_defeated), True, "black", "white")
+        self.enemies_defeated_text = text.render(self.font2, "Enemies Defeated: " + str(self.enemies_defeated), True, "black", "white")
         self.enemies_defeated_rect = self.enemies_defeated_text.get_rect()
         self.enemies_defeated_rect.centerx = centerx
-        self.time_text = self.font2.render("Time: " + str(time) + " seconds", True, "black", "white")
+        self.time_text = text.render(self.font2, "Time: " + str(time) + " seconds", True, "black", "white")
         self.time_rect = self.time_text.get_rect()
         self.time_rect.centerx = centerx
-        self.high_score_text = self.font2.render("High Score: " + str(self.high_score), True, "black", "white")
+        self.high_score_text = text.render(self.font2, "High Score: " + str(self.high_score), True, "black", "white")
         self.high_score_rect = self.high_score_text.get_rect()
         self.high_score_rect.centerx = centerx
         if not win:
@@ -249,45 +371,102 @@ class Game:
     # check for collisions
     def check_collision(self):
         # check collision between enemy/player
-        for enemy_obj in pg.sprite.spritecollide(self.player, self.enemies, False, pg.sprite.collide_mask):
-            # active_attack attribute means whether their attack hitbox is active
-            if self.player.active_attack:
+        # an attack hits when the attacker's hitbox (get_hitbox()) overlaps the body of the target (get_rect())
+        # only enemies in the spatial hash cells around the player are checked
+        # hitboxes and bodies are inside the sprites' images, so enemies that aren't near the player's image can't be hit or hit the player
+        player_hurtbox = self.player.get_rect(self.offsetx)
+        player_hitbox = self.player.get_hitbox(self.offsetx)
+        for enemy_obj in self.enemies.query(self.player.rect, self.offsetx):
+            if player_hitbox != None and player_hitbox.colliderect(enemy_obj.get_rect(self.offsetx)) and self.confirm_hit(self.player, enemy_obj):
                 enemy_obj.receive_attack(1)
             elif enemy_obj.active_attack:
-                self.player.receive_attack(1)
+                enemy_hitbox = enemy_obj.get_hitbox(self.offsetx)
+                if enemy_hitbox != None and enemy_hitbox.colliderect(player_hurtbox) and self.confirm_hit(enemy_obj, self.player):
+                    self.player.receive_attack(1)
         
         # check if player reaches portal to end level
         if self.player.collide_type(self.offsetx, [3, 4, 5, 6]):
             self.end_game(win=True)
+
+
+    # returns whether an attack whose hitbox overlaps the target's body actually hits
+    # with COMBAT_MASK_CHECK, the pixels of the attacker and target must also overlap
+    def confirm_hit(self, attacker, target):
+        return not COMBAT_MASK_CHECK or pg.sprite.collide_mask(attacker, target) != None
     
 
-    # generates an enemy for every enemy tile in the map
+    # adds the position of every enemy tile in the map to the spawn index
+    # enemies are generated later by spawn_enemies(), when they get close to the screen
     def generate_map_enemies(self):
-        for col in self.map.tilemap:
-            for tile in col:
-                if tile.type == 2:  # 2 is the type for enemy tile
-                    self.generate_enemy(tile.pos)
-                    tile.change_type(0, self.map.tilemap)
+        positions = ((np.argwhere(self.map.tilemap == 2) + (self.map.first_col, 0)) * self.map.tile_size).tolist()  # 2 is the type for enemy tile
+        self.spawn_index.add([tuple(pos) for pos in positions])
+        self.map.replace_type(2, 0)
+
+
+    # endless mode: loads the map ahead of the camera and retires the map behind it
+    # enemies and spawn positions in the retired part of the map are retired with it, without counting as defeated
+    # enemies that fall through a gap before then are retired by release_fallen_enemies()
+    def stream_map(self):
+        if not self.streamer.update(self.map, self.offsetx, self.screen_size[0]):
+            return
+        self.generate_map_enemies()
+        self.spawn_index.take(float("-inf"), self.map.pixel_left)
+        for enemy_obj in self.enemies.sprites():
+            if enemy_obj.pos[0] + enemy_obj.image.get_width() < self.map.pixel_left:
+                self.enemy_pool.release(enemy_obj)
+
+
+    # generates the enemies that are within activation distance of the screen
+    # the player is always on screen, so enemies exist before they can be activated
+    def spawn_enemies(self):
+        left = self.offsetx - entities.ENEMY_ACTIVATION_DISTANCE
+        right = self.offsetx + self.screen_size[0] + entities.ENEMY_ACTIVATION_DISTANCE
+        for pos in self.spawn_index.take(left, right):
+            self.generate_enemy(pos)
+
+
+    # returns enemies that fell through a gap out of the bottom of the map to the pool, without counting them as defeated
+    # otherwise they would keep falling, and keep being updated and drawn, until the game ends
+    def release_fallen_enemies(self):
+        bottom = self.map.tilemap.shape[1] * self.map.tile_size
+        if self.enemy_batch != None:
+            self.enemies_fallen += self.enemy_batch.remove_below(bottom)
+            return
+        for enemy_obj in self.enemies.sprites():
+            if enemy_obj.get_body()[1] > bottom:
+                self.enemy_pool.release(enemy_obj)
+                self.enemies_fallen += 1
 
 
     # spawn new enemy
     def generate_enemy(self, pos):
-        enemy_obj = entities.Enemy(self.parent, self.resources, pos, self.handle_enemy_death, self.difficulty, self.map.get_nearby_tiles)
-        self.all_sprites.add(self.player, enemy_obj)
-        self.enemies.add(enemy_obj)
+        if self.enemy_batch != None:
+            self.enemy_batch.add(pos)
+        else:
+            enemy_obj = self.enemy_pool.get(pos, self.handle_enemy_death, self.difficulty, self.map.get_nearby_tiles, self.map.sweep, self.map.get_flow_direction)
+            self.all_sprites.add(self.player, enemy_obj)
+            self.enemies.add(enemy_obj)
 
     # handles death of an enemy
     def handle_enemy_death(self):
         self.enemies_defeated += 1  # +1 score per enemy killed
 
+
+    # returns the enemies that are still alive to the pool, called when leaving the game
+    def release_enemies(self):
+        if self.enemy_batch == None:
+            for enemy_obj in self.enemies.sprites():
+                self.enemy_pool.release(enemy_obj)
+
     # handles scrolling of camera when player moves
-    def scroll(self):
+    # the camera follows where the player is drawn, see Entity.get_draw_offset()
+    def scroll(self, alpha=1):
         bg_w = self.map.pixel_width
-        new_offsetx = self.player.get_centerx() - self.screen_size[0] / 2
+        new_offsetx = self.player.get_centerx() + self.player.get_draw_offset(alpha)[0] - self.screen_size[0] / 2
 
-        # the offset cannot be less than 0
-        if new_offsetx < 0:
-            self.offsetx = 0
+        # the offset cannot be less than the left side of the map
+        if new_offsetx < self.map.pixel_left:
+            self.offsetx = self.map.pixel_left
         # the offset cannot go past the right side of the screen
         elif new_offsetx > bg_w - self.screen_size[0]:
             self.offsetx = bg_w - self.screen_size[0]
@@ -297,17 +476,21 @@ class Game:
 
     # stops player from going out of bounds
     def check_bounds(self):
-        if self.player.get_centerx() < 0:
-            self.player.set_centerx(0)
+        if self.player.get_centerx() < self.map.pixel_left:
+            self.player.set_centerx(self.map.pixel_left)
         elif self.player.get_centerx() > self.map.pixel_width:
             self.player.set_centerx(self.map.pixel_width)
+
+        # maps can have gaps in the floor, falling through one loses the game
+        if self.player.get_body()[1] > self.map.tilemap.shape[1] * self.map.tile_size:
+            self.end_game()
     
 
     # renders the score text
     def draw_score(self, score):
         # create score/speed text objects
         score_text_content = "Score: " + str(score)
-        score_text = self.font2.render(score_text_content, True, "black", "white")
+        score_text = text.render(self.font2, score_text_content, True, "black", "white")
         score_text_pos = score_text.get_rect()
         score_text_pos.left = 10
         score_text_pos.top = 10
@@ -46,6 +46,11 @@ class Main_Menu:
     self.sound_reminder_pos = self.sound_reminder_text.get_rect()
     self.sound_reminder_pos.centerx = self.screen_size[0]/2
     self.sound_reminder_pos.bottom = self.screen_size[1] - 30
+
+    # regions of the screen that changed in the last update (for dirty rect display updates)
+    # nothing on this screen moves, so only the first frame needs to be pushed to the display
+    self.dirty_rects = [self.parent.get_rect()]
+    self.drawn = False
     
 
   # called once per tick by main.py
@@ -61,6 +66,10 @@ class Main_Menu:
     for event in pygame.event.get():
       if event.type == pygame.QUIT:
         pygame.quit()
+
+      # the window needs repainting, so the next frame is pushed to the display again
+      if event.type in ui.REPAINT_EVENTS:
+        self.drawn = False
         
       # handle clicks on buttons
       if event.type == pygame.MOUSEBUTTONDOWN:
@@ -76,4 +85,14 @@ class Main_Menu:
     for button in self.buttons:
       button.draw()
     self.parent.blit(self.sound_reminder_text, self.sound_reminder_pos)
-    
\ No newline at end of file
+
+    if self.drawn:
+      self.dirty_rects = []
+    else:
+      self.dirty_rects = [self.parent.get_rect()]
+      self.drawn = True
+
+
+  # returns the regions of the screen that changed in the last update
+  def get_dirty_rects(self):
+    return self.dirty_rects
@@ -1,3 +1,4 @@
+import numpy as np
 import pygame as pg
 from ..components import ui, map
 
@@ -188,6 +189,12 @@ class Map_Creator:
             self.width_incrementer.draw()
         
     
+    # returns the regions of the screen that changed in the last update
+    # the map creator can change anywhere on screen at any time, so the whole screen is always pushed
+    def get_dirty_rects(self):
+        return [self.parent.get_rect()]
+
+    
     # moves screen horizontally by amount argument
     def move_screen(self, amount):
         self.offsetx += amount
@@ -234,10 +241,8 @@ class Map_Creator:
                 if self.selected_tile_type == 3:
                     self.place_portal(tile)
                 else:
-                    tile_changed = tile.change_type(self.selected_tile_type, self.map.tilemap)
-                    if tile_changed:  # if new tile, update surrounding tile images
-                        for tile in self.map.get_nearby_tiles(tile.pos, radius=2):
-                            tile.load_image(self.map.tilemap)
+                    # the map updates the images of surrounding tiles when the type changes
+                    tile.change_type(self.selected_tile_type)
     
 
     # generates a plain map with just a floor, given width
@@ -247,15 +252,8 @@ class Map_Creator:
         bg_height = self.resources["bg.png"].get_height()
         cols = int(bg_width*width/self.tile_size) + 1
         rows = int(bg_height/self.tile_size) + 1
-        tilemap = []
-        for i in range(cols):
-            col = []
-            for k in range(rows):
-                if k == rows-1:
-                    col.append(1)
-                else:
-                    col.append(0)
-            tilemap.append(col)
+        tilemap = np.zeros((cols, rows), dtype=np.uint8)
+        tilemap[:, rows-1] = 1  # floor
 
         map_data = {
             "name": "plain",
@@ -277,24 +275,25 @@ class Map_Creator:
     # the portal is 2x2 tiles
     # tile argument is the top left tile of the portal
     def place_portal(self, tile):
-        tilemap = self.map.tilemap
+        i, k = tile.list_pos
+        cols, rows = self.map.tilemap.shape
 
         # first, check if space is available for portal
-        if len(tilemap) - tile.list_pos[0] >= 2 and len(tilemap[0]) - tile.list_pos[1] >= 2:
+        if cols - i >= 2 and rows - k >= 2:
             # remove old portal if it exists
             if self.portal != None:
                 # change tiles of old portal to empty tiles
-                tilemap[self.portal.list_pos[0]][self.portal.list_pos[1]].change_type(0, tilemap)
-                tilemap[self.portal.list_pos[0]+1][self.portal.list_pos[1]].change_type(0, tilemap)
-                tilemap[self.portal.list_pos[0]][self.portal.list_pos[1]+1].change_type(0, tilemap)
-                tilemap[self.portal.list_pos[0]+1][self.portal.list_pos[1]+1].change_type(0, tilemap)
+                old_i, old_k = self.portal.list_pos
+                self.map.set_tile_type((old_i, old_k), 0)
+                self.map.set_tile_type((old_i+1, old_k), 0)
+                self.map.set_tile_type((old_i, old_k+1), 0)
+                self.map.set_tile_type((old_i+1, old_k+1), 0)
             self.portal = tile
 
             # change tiles to portal tiles
-            tilemap[tile.list_pos[0]][tile.list_pos[1]].change_type(3, tilemap)
-            tilemap[tile.list_pos[0]+1][tile.list_pos[1]].change_type(4, tilemap)
-            tilemap[tile.list_pos[0]][tile.list_pos[1]+1].change_type(5, tilemap)
-            tilemap[tile.list_pos[0]+1][tile.list_pos[1]+1].change_type(6, tilemap)
+            self.map.set_tile_type((i, k), 3)
+            self.map.set_tile_type((i+1, k), 4)
+            self.map.set_tile_type((i, k+1), 5)
+            self.map.set_tile_type((i+1, k+1), 6)
         else:
             print("Not enough space for portal.")
-
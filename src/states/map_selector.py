@@ -1,5 +1,5 @@
 import pygame as pg
-from ..components import ui
+from ..components import map_generator, streamer, ui
 
 class MapSelector:
     def __init__(self, parent, resources, maps, load_main_menu, load_game):
@@ -13,6 +13,10 @@ class MapSelector:
         self.offsety = 0  # for up and down scrolling through map menu
         self.buttons = []
 
+        # regions of the screen that changed in the last update (for dirty rect display updates)
+        self.dirty_rects = [self.parent.get_rect()]
+        self.drawn_offsety = None  # offsety when the screen was last drawn
+
         # BACK BUTTON
         self.back_button = ui.Button(self.parent, resources["back_button.png"], (10, 10), self.load_main_menu)
         self.buttons.append(self.back_button)
@@ -27,7 +31,7 @@ class MapSelector:
         font = pg.font.Font(None, int(map_row_size[1]/2))
         self.map_rows = []
         i = 0
-        for map in maps:
+        for map in [streamer.ENDLESS_MAP, map_generator.GENERATED_MAP] + maps:  # endless mode and a generated map are always the first rows
             map_row = MapRow(self.parent, resources, load_game, map, map_row_size, font)
             map_row.rect.centerx = screen_size[0]/2
             map_row.rect.top = i*(map_row_marginy + map_row_size[1]) + 100
@@ -48,6 +52,10 @@ class MapSelector:
         for e in pg.event.get():
             if e.type == pg.QUIT:
                 pg.quit()
+
+            # the window needs repainting, so the next frame is pushed to the display again
+            if e.type in ui.REPAINT_EVENTS:
+                self.drawn_offsety = None
             
             if e.type == pg.MOUSEBUTTONDOWN:
                 if e.button == 1:
@@ -70,6 +78,18 @@ class MapSelector:
         self.parent.blit(self.resources["scroll_text.png"], self.scroll_rect)
         self.back_button.draw()
 
+        # the screen only changes when it is scrolled
+        if self.offsety != self.drawn_offsety:
+            self.dirty_rects = [self.parent.get_rect()]
+            self.drawn_offsety = self.offsety
+        else:
+            self.dirty_rects = []
+
+
+    # returns the regions of the screen that changed in the last update
+    def get_dirty_rects(self):
+        return self.dirty_rects
+
 
 # Map Row is a single row in the map selection screen that contains map details and a select button
 class MapRow:
@@ -0,0 +1,26 @@
+# Shared fixtures for the tests, run from the repository root: python -m pytest
+# Tests run without a window or sound device, using SDL's dummy drivers.
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src import resource_handler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# the display, which resources are converted to, and the loaded resources
+@pytest.fixture(scope="session")
+def screen():
+    os.chdir(ROOT)  # resource paths are relative to the repository root
+    pygame.init()
+    return pygame.display.set_mode((600, 400))
+
+
+@pytest.fixture(scope="session")
+def resources(screen):
+    return resource_handler.load_resources(None, None)
@@ -0,0 +1,36 @@
+# Static screens only push the display when they change, so they must push it again when the window needs repainting.
+
+import pygame
+import pytest
+
+from src.components import ui
+from src.states import difficulty_change, main_menu, map_selector
+
+
+def noop(*args, **kwargs):
+    pass
+
+
+STATES = {
+    "main_menu": lambda screen, resources: main_menu.Main_Menu(screen, resources, noop, noop, noop),
+    "difficulty_change": lambda screen, resources: difficulty_change.Difficulty_Change(screen, resources, noop, "easy"),
+    "map_selector": lambda screen, resources: map_selector.MapSelector(screen, resources, [], noop, noop),
+}
+
+
+@pytest.mark.parametrize("event_type", ui.REPAINT_EVENTS)
+@pytest.mark.parametrize("state_name", STATES)
+def test_repaint_event_pushes_whole_screen(screen, resources, state_name, event_type):
+    pygame.event.clear()
+    state = STATES[state_name](screen, resources)
+    state.update()
+    assert state.get_dirty_rects()
+    state.update()
+    assert state.get_dirty_rects() == []
+
+    pygame.event.post(pygame.event.Event(event_type))
+    state.update()
+    assert state.get_dirty_rects() == [screen.get_rect()]
+
+    state.update()
+    assert state.get_dirty_rects() == []
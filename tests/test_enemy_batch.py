@@ -0,0 +1,29 @@
+# Slots of dead enemies in an EnemyBatch are reused, so the arrays don't grow with every spawn.
+
+import numpy as np
+
+from src.components import enemy_batch, map
+
+TILE_SIZE = 32
+
+
+def test_dead_enemy_slots_are_reused(screen, resources):
+    tilemap = np.zeros((40, 13), dtype=np.uint8)
+    tilemap[:, 12] = 1
+    game_map = map.Map(screen, resources, TILE_SIZE, {"name": "flat", "tilemap": tilemap, "width": 2})
+    batch = enemy_batch.EnemyBatch(screen, resources, game_map, "easy", lambda: None, ())
+
+    for i in range(3):
+        batch.add((100 + i*100, 12*TILE_SIZE + 4))
+    batch.kill(1)
+    batch.remove_below(-1000)  # every enemy is below this, so the other two are removed too
+    assert not batch.alive[:batch.count].any()
+
+    # spawning and killing many more enemies than there are slots doesn't add slots
+    for i in range(100):
+        batch.add((100, 12*TILE_SIZE + 4))
+        alive = np.nonzero(batch.alive[:batch.count])[0]
+        assert len(alive) == 1
+        batch.kill(int(alive[0]))
+    assert batch.count == 3
+    assert batch.capacity == 16
@@ -0,0 +1,50 @@
+# Enemies that fall through a gap out of the bottom of the map are released, instead of falling forever.
+
+import numpy as np
+import pygame
+import pytest
+
+from src.components import enemy_pool
+from src.states import game
+
+TILE_SIZE = 32
+
+
+def noop(*args, **kwargs):
+    pass
+
+
+# a flat map with a gap under an enemy, close enough to the player for the enemy to become active
+def create_map_data():
+    tilemap = np.zeros((40, 13), dtype=np.uint8)
+    tilemap[:, 12] = 1  # floor
+    tilemap[8:12, 12] = 0  # gap
+    tilemap[9, 11] = 2  # enemy
+    return {"name": "gap", "tilemap": tilemap, "width": 2}
+
+
+@pytest.mark.parametrize("enemy_backend", ["sprites", "batch"])
+def test_enemy_falling_through_gap_is_released(screen, resources, monkeypatch, enemy_backend):
+    # the music folder isn't part of the repository
+    monkeypatch.setattr(pygame.mixer.music, "play", noop)
+    monkeypatch.setattr(pygame.mixer.music, "rewind", noop)
+    pool = enemy_pool.EnemyPool(screen, resources)
+    g = game.Game(screen, resources, noop, noop, 0, "easy", TILE_SIZE, create_map_data(), 30, enemy_backend, False, pool)
+
+    for i in range(120):
+        g.step()
+        if g.enemies_fallen:
+            break
+
+    assert g.enemies_fallen == 1
+    assert g.enemies_defeated == 0
+    assert len(g.enemies) == 0
+    if enemy_backend == "batch":
+        assert not g.enemy_batch.alive[:g.enemy_batch.count].any()
+    else:
+        assert len(pool.enemies) == 1
+
+    # nothing is left to release once the enemy is gone
+    for i in range(30):
+        g.step()
+    assert g.enemies_fallen == 1
@@ -0,0 +1,24 @@
+# The map generator only needs the size of the background, not a display or loaded resources.
+
+import numpy as np
+
+from src.components import map_generator
+
+BG_SIZE = (711, 400)
+TILE_SIZE = 32
+
+
+def test_generated_map_is_seeded():
+    map_data = map_generator.generate_map(BG_SIZE, TILE_SIZE, 3, 5, "test")
+    assert map_data["name"] == "test"
+    assert map_data["width"] == 5
+    assert map_data["tilemap"].shape == (int(711*5/TILE_SIZE) + 1, int(400/TILE_SIZE) + 1)
+    assert np.array_equal(map_data["tilemap"], map_generator.generate_map(BG_SIZE, TILE_SIZE, 3, 5, "test")["tilemap"])
+    assert not np.array_equal(map_data["tilemap"], map_generator.generate_map(BG_SIZE, TILE_SIZE, 4, 5, "test")["tilemap"])
+
+
+def test_generated_map_ends_with_portal():
+    tilemap = map_generator.generate_map(BG_SIZE, TILE_SIZE, 0, 5)["tilemap"]
+    cols, rows = tilemap.shape
+    assert tilemap[cols-3:cols-1, rows-3:rows-1].tolist() == [[3, 5], [4, 6]]
+    assert (tilemap[cols-map_generator.PORTAL_COLUMNS:, rows-1] == 1).all()  # floor under the portal